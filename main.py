@@ -2,6 +2,13 @@ from os_computer_use.streaming import Sandbox, DisplayClient
 from os_computer_use.browser import Browser
 from os_computer_use.sandbox_agent import SandboxAgent
 from os_computer_use.logging import Logger
+from os_computer_use.sandbox_pool import SandboxPool
+from os_computer_use.trajectory import TrajectoryStore
+from os_computer_use.archive import prune_archives
+from os_computer_use.transport import preconnect
+from os_computer_use.checkpoint import Checkpoint, RESUME_TIMEOUT
+from os_computer_use.display import DisplayProfile
+from os_computer_use.config import vision_model, action_model, grounding_model
 import asyncio
 import argparse
 
@@ -18,12 +25,46 @@ load_dotenv()
 os.environ["E2B_API_KEY"] = os.getenv("E2B_API_KEY")
 
 
-async def start(user_input=None, output_dir=None):
+# Connect to the sandbox of a checkpoint if it is still running, or create a new one
+def reattach(sandbox_id, display_profile):
+    try:
+        sandbox = Sandbox.connect(sandbox_id)
+        if sandbox.is_running():
+            print(f"Reattached to sandbox {sandbox_id}")
+            sandbox.display_profile = display_profile
+            return sandbox, True
+    except Exception as e:
+        print(f"Could not reattach to sandbox {sandbox_id}: {str(e)}")
+    print("Starting a new sandbox to repeat the recorded actions...")
+    return Sandbox(display_profile), False
+
+
+async def start(
+    user_input=None,
+    output_dir=None,
+    speculative=False,
+    marks=False,
+    pool=None,
+    trajectories=None,
+    capture_format=None,
+    resume=None,
+    display_profile=None,
+):
     sandbox = None
     client = None
-    
+    agent = None
+    reattached = False
+    completed = False
+
     try:
-        sandbox = Sandbox()
+        # Connect to the model providers while the sandbox boots
+        preconnect(vision_model, action_model, grounding_model)
+
+        if resume:
+            sandbox, reattached = reattach(resume["sandbox_id"], display_profile)
+        else:
+            # Take a sandbox that is already booted, if there is a pool
+            sandbox = pool.acquire() if pool else Sandbox(display_profile)
 
         # The display server won't work on desktop-dev-v2 since ffmpeg is not installed
         #client = DisplayClient(output_dir)
@@ -34,22 +75,39 @@ async def start(user_input=None, output_dir=None):
         # await client.start(stream_url, user_input or "Sandbox", delay=5)
         # webbrowser.open_new_tab(stream_url)
 
-        agent = SandboxAgent(sandbox, output_dir)
+        agent = SandboxAgent(
+            sandbox,
+            output_dir,
+            speculative=speculative,
+            set_of_marks=marks,
+            trajectories=trajectories,
+            capture_format=capture_format,
+        )
 
-        print("Starting the VNC server...")
-        sandbox.stream.start()
+        # A reattached sandbox is still running its VNC server
+        if not pool and not reattached:
+            print("Starting the VNC server...")
+            sandbox.stream.start()
         vnc_url = sandbox.stream.get_url()
 
         print("Starting the VNC client...")
-        browser = Browser()
+        browser = Browser(*sandbox.display_profile.resolution)
         browser.open(vnc_url)
 
         if not user_input:
             raise ValueError("Provide input!")
 
-        agent.run(user_input)
+        agent.run(user_input, resume, reattached)
+        completed = True
 
     finally:
+        # Keep the sandbox of a failed run that got past its first step
+        resumable = not completed and agent and agent.checkpoint and agent.trajectory
+
+        if agent:
+            print("Saving the run archive...")
+            agent.close()
+
         if client:
            print("Stopping the display client...")
            try:
@@ -57,7 +115,18 @@ async def start(user_input=None, output_dir=None):
            except Exception as e:
                print(f"Error stopping display client: {str(e)}")
 
-        if sandbox:
+        if sandbox and resumable:
+            print(
+                f"Keeping the sandbox running for {RESUME_TIMEOUT} seconds. "
+                f"To continue the run, use --resume {output_dir}"
+            )
+            try:
+                sandbox.set_timeout(RESUME_TIMEOUT)
+            except Exception as e:
+                print(f"Error extending the sandbox timeout: {str(e)}")
+        elif sandbox and pool:
+            pool.release(sandbox)
+        elif sandbox:
             print("Stopping the sandbox...")
             try:
                 sandbox.kill()
@@ -88,12 +157,118 @@ def initialize_output_directory(directory_format):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--prompt", type=str, help="User prompt for the agent")
+    parser.add_argument(
+        "--prompt",
+        type=str,
+        action="append",
+        help="User prompt for the agent (repeat to run several tasks)",
+    )
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="Describe the next screen in the background while actions finish",
+    )
+    parser.add_argument(
+        "--marks",
+        action="store_true",
+        help="Number the elements on the screen so the agent can click them by id",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=0,
+        help="Number of sandboxes to keep booted ahead of the next task",
+    )
+    parser.add_argument(
+        "--trajectories",
+        type=str,
+        help="Folder of successful runs to replay when an instruction repeats",
+    )
+    parser.add_argument(
+        "--capture-format",
+        type=str.upper,
+        choices=["PNG", "JPEG", "WEBP"],
+        help="Capture only the changed part of the screen in this image format",
+    )
+    parser.add_argument(
+        "--resolution",
+        type=DisplayProfile.parse_resolution,
+        default="1024x768",
+        help="Screen resolution of the sandbox, e.g. 800x600",
+    )
+    parser.add_argument(
+        "--dpi-scale",
+        type=float,
+        default=1.0,
+        help="Size of text and icons on the screen, relative to 96 DPI",
+    )
+    parser.add_argument(
+        "--color-depth",
+        type=int,
+        choices=[8, 16, 24],
+        default=24,
+        help="Bits per pixel of the captured screenshots",
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        metavar="RUN_DIR",
+        help="Continue a run from its checkpoint, e.g. ./output/run_3",
+    )
     args = parser.parse_args()
 
-    output_dir = initialize_output_directory(lambda id: f"./output/run_{id}")
+    # Continue an interrupted run in its own output folder
+    resume = None
+    if args.resume:
+        resume = Checkpoint(args.resume).load()
+        if not resume:
+            parser.error(f"There is no checkpoint in {args.resume}")
+        if resume["finished"]:
+            parser.error(f"The run in {args.resume} has already finished")
+
+    # A resumed run keeps the display of its checkpoint
+    if resume:
+        display_profile = DisplayProfile(**resume["display_profile"])
+    else:
+        width, height = args.resolution
+        display_profile = DisplayProfile(
+            width, height, args.dpi_scale, args.color_depth
+        )
+
+    # Delete the archives of old runs beyond the retention limits
+    prune_archives("./output/*/run.archive")
+
+    prompts = [resume["instruction"]] if resume else args.prompt or [None]
+    pool = (
+        SandboxPool(lambda: Sandbox(display_profile), size=args.pool_size)
+        if args.pool_size
+        else None
+    )
+    trajectories = TrajectoryStore(args.trajectories) if args.trajectories else None
+
     loop = asyncio.get_event_loop()
-    loop.run_until_complete(start(user_input=args.prompt, output_dir=output_dir))
+    try:
+        for prompt in prompts:
+            output_dir = args.resume or initialize_output_directory(
+                lambda id: f"./output/run_{id}"
+            )
+            loop.run_until_complete(
+                start(
+                    user_input=prompt,
+                    output_dir=output_dir,
+                    speculative=args.speculative,
+                    marks=args.marks,
+                    pool=pool,
+                    trajectories=trajectories,
+                    capture_format=args.capture_format,
+                    resume=resume,
+                    display_profile=display_profile,
+                )
+            )
+    finally:
+        if pool:
+            print("Stopping the sandbox pool...")
+            pool.close()
     print("done")
 
 
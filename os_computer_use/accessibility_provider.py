@@ -0,0 +1,140 @@
+from os_computer_use.grounding import (
+    normalize_text,
+    best_unambiguous_match,
+    ROLE_WORDS,
+)
+
+from difflib import SequenceMatcher
+import hashlib
+import json
+import shlex
+
+# Script run inside the sandbox to list the visible elements of the accessibility tree
+ACCESSIBILITY_SCRIPT = """
+import json
+import gi
+gi.require_version("Atspi", "2.0")
+from gi.repository import Atspi
+
+elements = []
+
+def walk(node, depth):
+    if depth > 40 or len(elements) > 3000:
+        return
+    try:
+        states = node.get_state_set()
+        name = node.get_name()
+        if name and states.contains(Atspi.StateType.SHOWING):
+            box = node.get_extents(Atspi.CoordType.SCREEN)
+            if box.width > 0 and box.height > 0:
+                elements.append([name, node.get_role_name(), box.x, box.y, box.width, box.height])
+        for i in range(node.get_child_count()):
+            walk(node.get_child_at_index(i), depth + 1)
+    except Exception:
+        pass
+
+desktop = Atspi.get_desktop(0)
+for i in range(desktop.get_child_count()):
+    walk(desktop.get_child_at_index(i), 0)
+print(json.dumps(elements))
+"""
+
+# Minimum name similarity to click an element without asking the grounding model
+MATCH_THRESHOLD = 0.85
+# A different element scoring this close to the best match makes the match ambiguous
+AMBIGUITY_MARGIN = 0.05
+
+# Roles that are usually the target of a click
+CLICKABLE_ROLES = {
+    "push button",
+    "toggle button",
+    "check box",
+    "radio button",
+    "menu item",
+    "menu",
+    "page tab",
+    "link",
+    "entry",
+    "combo box",
+    "list item",
+    "table cell",
+    "icon",
+}
+
+
+class AccessibilityProvider:
+    """
+    The accessibility provider finds elements by name in the sandbox's AT-SPI accessibility tree.
+    """
+
+    def __init__(self, sandbox):
+        self.sandbox = sandbox
+        self.display = getattr(sandbox, "_display", ":0")
+        self.available = True  # Disabled after the helper script fails
+        self.frame = None  # Hash of the frame the cached elements belong to
+        self.elements = []  # Cached elements as (name, role, x, y, width, height)
+
+    # Read the accessibility tree, reusing the cached tree while the screen is unchanged
+    def get_elements(self, screenshot):
+        frame = hashlib.sha256(screenshot).hexdigest()
+        if frame == self.frame:
+            return self.elements
+
+        result = self.sandbox.commands.run(
+            f"DISPLAY={self.display} python3 -c {shlex.quote(ACCESSIBILITY_SCRIPT)}",
+            timeout=5,
+        )
+        self.elements = [tuple(element) for element in json.loads(result.stdout)]
+        self.frame = frame
+        return self.elements
+
+    # The elements shown on a screenshot, or nothing if the tree can't be read
+    def visible_elements(self, screenshot):
+        if not self.available:
+            return []
+        try:
+            return self.get_elements(screenshot)
+        except Exception as e:
+            print(f"Accessibility tree is not available: {e}")
+            self.available = False
+            return []
+
+    # Score how well an element's name matches the query
+    def similarity(self, query, name):
+        name = normalize_text(name)
+        if not name:
+            return 0
+        words = query.split()
+        target = " ".join(word for word in words if word not in ROLE_WORDS) or query
+        return max(
+            SequenceMatcher(None, query, name).ratio(),
+            SequenceMatcher(None, target, name).ratio(),
+        )
+
+    # Bonus used to rank elements whose names match equally well
+    def role_bonus(self, query, role):
+        bonus = 0
+        # Prefer elements whose role is named in the query, e.g. "OK button"
+        if any(word in role.split() for word in query.split() if word in ROLE_WORDS):
+            bonus += 0.1
+        if role in CLICKABLE_ROLES:
+            bonus += 0.05
+        return bonus
+
+    def call(self, prompt, image_data):
+        with open(image_data, "rb") as f:
+            elements = self.visible_elements(f.read())
+
+        # Only names that match well enough are candidates, then roles help rank them
+        query = normalize_text(prompt)
+        matches = []
+        for name, role, x, y, width, height in elements:
+            similarity = self.similarity(query, name)
+            if similarity >= MATCH_THRESHOLD:
+                score = similarity + self.role_bonus(query, role)
+                matches.append((score, (x, y, width, height)))
+        # Among equal scores, prefer the smallest element
+        matches.sort(key=lambda match: (-match[0], match[1][2] * match[1][3]))
+
+        # Give up if another element elsewhere on the screen matches almost as well
+        return best_unambiguous_match(matches, MATCH_THRESHOLD, AMBIGUITY_MARGIN)
@@ -0,0 +1,226 @@
+from os_computer_use.logging import logger
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import glob
+import hashlib
+import html
+import json
+import mmap
+import os
+import struct
+
+# Archive layout: MAGIC, records..., JSON index, footer
+MAGIC = b"OCUARCH1"
+# Footer: index offset, index length, MAGIC
+FOOTER = struct.Struct("<QQ8s")
+# Record header: kind, payload length, SHA-256 of the frame.
+# A frame record holds the frame data, and a name record holds an image file name.
+RECORD = struct.Struct("<BI32s")
+FRAME_RECORD = 0
+NAME_RECORD = 1
+
+# Default retention limits for the archives of past runs
+ARCHIVE_MAX_RUNS = 100
+ARCHIVE_MAX_BYTES = 2 * 1024**3
+
+
+def read_index(f):
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    if size < len(MAGIC) + FOOTER.size:
+        raise ValueError("Not a run archive")
+    f.seek(size - FOOTER.size)
+    offset, length, magic = FOOTER.unpack(f.read(FOOTER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a run archive, or it was not closed")
+    f.seek(offset)
+    return offset, json.loads(f.read(length))
+
+
+# Rebuild the frames and image names of an archive that was not closed
+# from its records, and return them with the end of the last complete record
+def scan_records(f):
+    frames, images = {}, {}
+    f.seek(0)
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a run archive")
+    end = f.tell()
+    while True:
+        header = f.read(RECORD.size)
+        if len(header) < RECORD.size:
+            break
+        kind, length, digest = RECORD.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length:
+            break
+        key = digest.hex()
+        if kind == FRAME_RECORD and hashlib.sha256(payload).hexdigest() == key:
+            frames[key] = (end + RECORD.size, length)
+        elif kind == NAME_RECORD and key in frames:
+            images[payload.decode()] = key
+        else:
+            break
+        end = f.tell()
+    return frames, images, end
+
+
+# Stores the frames, trace and log of a run in a single file, keeping each distinct frame once.
+# Frames are written as records, so an archive that was not closed can be recovered.
+class RunArchive:
+
+    def __init__(self, path):
+        self.path = path
+        self.frames = {}  # Frame hash -> (offset, length)
+        self.images = {}  # Image file name -> frame hash
+        self.log = []  # Log entries of earlier sessions of the run
+        self.file = open(path, "r+b" if os.path.exists(path) else "w+b")
+
+        # Continue an existing archive by overwriting its index
+        try:
+            offset, index = read_index(self.file)
+            self.frames = {key: tuple(value) for key, value in index["frames"].items()}
+            self.images = index["images"]
+            self.log = index["log"]
+        except ValueError:
+            offset = self.recover()
+        self.file.seek(offset)
+        self.file.truncate()
+
+    # Recover the records of an archive that was not closed, and return where they end.
+    # A file that isn't an archive is moved aside.
+    def recover(self):
+        if self.file.seek(0, os.SEEK_END) == 0:
+            self.file.write(MAGIC)
+            return len(MAGIC)
+        try:
+            self.frames, self.images, end = scan_records(self.file)
+            return end
+        except ValueError:
+            self.file.close()
+            os.replace(self.path, f"{self.path}.invalid")
+            logger.log(f"{self.path} is not a run archive, moved it to .invalid", "gray")
+            self.file = open(self.path, "w+b")
+            self.file.write(MAGIC)
+            return len(MAGIC)
+
+    # Store an image and return its content hash
+    def add_frame(self, data, name=None):
+        digest = hashlib.sha256(data).digest()
+        key = digest.hex()
+        if key not in self.frames:
+            self.file.write(RECORD.pack(FRAME_RECORD, len(data), digest))
+            self.frames[key] = (self.file.tell(), len(data))
+            self.file.write(data)
+        if name:
+            self.images[name] = key
+            name = name.encode()
+            self.file.write(RECORD.pack(NAME_RECORD, len(name), digest))
+            self.file.write(name)
+        # Hand the records to the OS so that they survive a crash of the process
+        self.file.flush()
+        return key
+
+    # Write the index, with the run's log entries and trace, and close the file
+    def close(self, log=(), trace=()):
+        index = json.dumps(
+            {
+                "frames": self.frames,
+                "images": self.images,
+                "log": self.log + list(log),
+                "trace": list(trace),
+            }
+        ).encode()
+        offset = self.file.tell()
+        self.file.write(index)
+        self.file.write(FOOTER.pack(offset, len(index), MAGIC))
+        self.file.close()
+
+
+# Reads frames from an archive on demand through a memory map
+class ArchiveReader:
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        _, index = read_index(self.file)
+        self.frames = index["frames"]
+        self.images = index["images"]
+        self.log = index["log"]
+        self.trace = index["trace"]
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def frame(self, key):
+        offset, length = self.frames[key]
+        return self.map[offset : offset + length]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# Delete the oldest archives beyond the retention limits
+def prune_archives(pattern, max_runs=ARCHIVE_MAX_RUNS, max_bytes=ARCHIVE_MAX_BYTES):
+    archives = sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
+    total = 0
+    for i, path in enumerate(archives):
+        total += os.path.getsize(path)
+        if i >= max_runs or total > max_bytes:
+            os.remove(path)
+
+
+# Render the log of an archive, with images loaded only when they scroll into view
+def render_log(reader):
+    content = ""
+    for entry in reader.log:
+        text = entry["text"]
+        content += f"<p style='color:{entry['color']}'>{html.escape(text)}</p>\n"
+        for name, key in reader.images.items():
+            if name in text:
+                content += f"<img loading='lazy' width='100%' src='/frames/{key}'>\n"
+    with open(os.path.join(os.path.dirname(__file__), "templates", "log.html")) as f:
+        return f.read().replace("{{content}}", content)
+
+
+def view(path, port=8000):
+    reader = ArchiveReader(path)
+    page = render_log(reader).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/frames/"):
+                key = self.path[len("/frames/") :]
+                if key not in reader.frames:
+                    return self.send_error(404)
+                body, content_type = reader.frame(key), "image/png"
+            else:
+                body, content_type = page, "text/html"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    print(f"Viewing {path} at http://localhost:{port}")
+    ThreadingHTTPServer(("localhost", port), Handler).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="View and prune run archives")
+    commands = parser.add_subparsers(dest="command", required=True)
+    view_parser = commands.add_parser("view", help="Serve an archive's log")
+    view_parser.add_argument("path")
+    view_parser.add_argument("--port", type=int, default=8000)
+    prune_parser = commands.add_parser("prune", help="Delete old archives")
+    prune_parser.add_argument("pattern", help="e.g. './output/*/run.archive'")
+    prune_parser.add_argument("--max-runs", type=int, default=ARCHIVE_MAX_RUNS)
+    prune_parser.add_argument("--max-bytes", type=int, default=ARCHIVE_MAX_BYTES)
+    args = parser.parse_args()
+
+    if args.command == "view":
+        view(args.path, args.port)
+    else:
+        prune_archives(args.pattern, args.max_runs, args.max_bytes)
+
+
+if __name__ == "__main__":
+    main()
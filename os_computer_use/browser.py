@@ -3,11 +3,13 @@ import threading
 from multiprocessing import Process, Queue
 import webview
 
+from os_computer_use.display import DEFAULT_WIDTH, DEFAULT_HEIGHT
+
 
 class Browser:
-    def __init__(self):
-        self.width = 1024
-        self.height = 768
+    def __init__(self, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
+        self.width = width
+        self.height = height
         self.window_frame_height = 29  # Additional px for window border
         self.command_queue = Queue()
         self.webview_process = None
@@ -0,0 +1,109 @@
+from PIL import Image
+
+import base64
+import io
+import json
+import shlex
+import threading
+
+# Script run inside the sandbox to capture the screen and print the part that changed
+CAPTURE_SCRIPT = """
+import base64, io, json, os, subprocess, sys
+from PIL import Image, ImageChops
+
+sequence, image_format, quality = int(sys.argv[1]), sys.argv[2], int(sys.argv[3])
+color_depth, state_dir = int(sys.argv[4]), sys.argv[5]
+state_path = os.path.join(state_dir, "capture_state.json")
+previous_path = os.path.join(state_dir, "capture_previous.raw")
+capture_path = os.path.join(state_dir, "capture.png")
+
+subprocess.run(["scrot", "--pointer", "--overwrite", capture_path], check=True)
+frame = Image.open(capture_path).convert("RGB")
+
+# Keep only the high bits of each channel at lower color depths
+if color_depth < 24:
+    mask = (0xFF << (8 - color_depth // 3)) & 0xFF
+    frame = frame.point(lambda value: value & mask)
+
+# Compare with the previous frame if the client still holds it
+box = (0, 0, frame.width, frame.height)
+try:
+    with open(state_path) as f:
+        state = json.load(f)
+    if state["sequence"] == sequence and tuple(state["size"]) == frame.size:
+        with open(previous_path, "rb") as f:
+            previous = Image.frombytes("RGB", frame.size, f.read())
+        box = ImageChops.difference(frame, previous).getbbox()
+except (OSError, ValueError, KeyError):
+    pass
+
+with open(previous_path, "wb") as f:
+    f.write(frame.tobytes())
+with open(state_path, "w") as f:
+    json.dump({"sequence": sequence + 1, "size": frame.size}, f)
+
+tile = None
+if box:
+    buffer = io.BytesIO()
+    frame.crop(box).save(buffer, format=image_format, quality=quality)
+    tile = base64.b64encode(buffer.getvalue()).decode()
+print(json.dumps({"size": frame.size, "box": box, "tile": tile}))
+"""
+
+
+# Captures only the changed region of the screen inside the sandbox,
+# and rebuilds the full frame on the client
+class RegionCapture:
+
+    def __init__(
+        self, sandbox, image_format="PNG", quality=85, color_depth=24, state_dir="/tmp"
+    ):
+        self.sandbox = sandbox
+        self.image_format = image_format  # PNG is lossless, JPEG or WEBP are smaller
+        self.quality = quality  # Quality of lossy formats
+        self.color_depth = color_depth  # Bits per pixel of the captured frames
+        self.state_dir = state_dir  # Folder in the sandbox for the previous frame
+        self.available = True  # Falls back to full screenshots if the script fails
+        self.sequence = -1  # Number of the frame held by the client
+        self.frame = None  # Full frame as a PIL image
+        self.png = None  # Full frame as PNG bytes
+        self.lock = threading.Lock()
+
+    def capture(self):
+        arguments = (
+            f"{self.sequence} {self.image_format} {self.quality} {self.color_depth} "
+            f"{shlex.quote(self.state_dir)}"
+        )
+        result = self.sandbox.commands.run(
+            f"python3 -c {shlex.quote(CAPTURE_SCRIPT)} {arguments}", timeout=10
+        )
+        capture = json.loads(result.stdout)
+
+        # Nothing changed since the last frame
+        if not capture["box"]:
+            self.sequence += 1
+            return self.png
+
+        tile = Image.open(io.BytesIO(base64.b64decode(capture["tile"])))
+        size = tuple(capture["size"])
+        if self.frame is None or self.frame.size != size:
+            self.frame = Image.new("RGB", size)
+        self.frame.paste(tile.convert("RGB"), tuple(capture["box"][:2]))
+
+        buffer = io.BytesIO()
+        self.frame.save(buffer, format="PNG", compress_level=1)
+        self.png = buffer.getvalue()
+        self.sequence += 1
+        return self.png
+
+    # Return the full frame as PNG bytes, like Sandbox.screenshot()
+    def screenshot(self):
+        if not self.available:
+            return self.sandbox.screenshot()
+        with self.lock:
+            try:
+                return self.capture()
+            except Exception as e:
+                print(f"Region capture is not available, using full screenshots: {e}")
+                self.available = False
+        return self.sandbox.screenshot()
@@ -0,0 +1,121 @@
+from os_computer_use.logging import logger
+
+import json
+import threading
+
+# Observations showing that the previous action failed
+ERROR_OBSERVATIONS = (
+    "Error executing function",
+    "Function not implemented",
+    "There is no element",
+)
+
+# Number of responses that may wait to be kept, such as a speculative one and the agent's own
+UNCONFIRMED = 4
+
+
+# The actions the agent executed most recently, which it records as JSON messages
+# each followed by an observation
+def executed_tool_calls(messages):
+    tool_calls = []
+    for message in reversed(messages):
+        content = message.get("content")
+        if isinstance(content, str) and content.startswith("OBSERVATION:"):
+            continue
+        try:
+            tool_call = json.loads(content) if isinstance(content, str) else None
+        except json.JSONDecodeError:
+            tool_call = None
+        if isinstance(tool_call, dict) and "name" in tool_call:
+            tool_calls.insert(0, tool_call)
+        elif tool_calls:
+            break
+    return tool_calls
+
+
+class CascadeProvider:
+    """
+    The cascade provider calls a fast model first, and calls a stronger model instead
+    when the fast model's response or the state of the task suggests it will fail.
+    """
+
+    def __init__(self, fast, strong):
+        self.fast = fast
+        self.strong = strong
+        self.model = f"{fast.model} > {strong.model}"
+        self.providers = (fast, strong)
+        self.escalate_next = False  # Set by the agent when an action didn't change the screen
+        self.calls = 0  # Number of responses the agent kept
+        self.escalations = {}  # Number of kept responses that were escalated, by reason
+        self.unconfirmed = []  # (response, escalation reason) of responses not kept yet
+        self.lock = threading.Lock()  # Calls may run on the speculation thread
+
+    # A reason to skip the fast model, based on how the previous step went
+    def escalation_before(self, messages):
+        with self.lock:
+            escalate, self.escalate_next = self.escalate_next, False
+        if escalate:
+            return "unchanged screen"
+        for message in reversed(messages):
+            content = message.get("content")
+            if isinstance(content, str) and content.startswith("OBSERVATION:"):
+                if any(error in content for error in ERROR_OBSERVATIONS):
+                    return "error observation"
+                break
+        return None
+
+    # A reason to discard the fast model's response
+    def escalation_after(self, messages, response, functions):
+        if not functions:
+            return None if response else "empty response"
+        content, tool_calls = response
+        if not tool_calls:
+            return "no tool calls"
+        if tool_calls == executed_tool_calls(messages)[-len(tool_calls) :]:
+            return "repeated actions"
+        return None
+
+    # The response of the fast model, or of the strong model when escalating.
+    # It only counts in the report once the agent keeps it.
+    def call(self, messages, functions=None):
+        reason = self.escalation_before(messages)
+        if not reason:
+            try:
+                # Providers may modify the messages, so each call gets its own copy
+                response = self.fast.call([dict(m) for m in messages], functions)
+                reason = self.escalation_after(messages, response, functions)
+            except Exception as e:
+                reason = "error"
+                print(f"Error calling {self.fast.model}: {e}")
+
+        if reason:
+            logger.log(f"escalating to {self.strong.model} ({reason})", "gray")
+            response = self.strong.call([dict(m) for m in messages], functions)
+
+        with self.lock:
+            self.unconfirmed = [(response, reason), *self.unconfirmed[: UNCONFIRMED - 1]]
+        return response
+
+    # Count a response that the agent used, rather than discarded
+    def keep(self, response):
+        with self.lock:
+            for i, (unconfirmed, reason) in enumerate(self.unconfirmed):
+                if unconfirmed is response:
+                    del self.unconfirmed[i]
+                    self.calls += 1
+                    if reason:
+                        self.escalations[reason] = self.escalations.get(reason, 0) + 1
+                    return
+
+    # Summarize how often the stronger model was needed
+    def report(self):
+        with self.lock:
+            calls, escalations = self.calls, dict(self.escalations)
+        if not calls:
+            return ""
+        escalated = sum(escalations.values())
+        reasons = ", ".join(f"{reason}: {n}" for reason, n in escalations.items())
+        return (
+            f"{self.model}: {escalated}/{calls} calls escalated "
+            f"({escalated / calls:.0%})" + (f" - {reasons}" if reasons else "")
+        )
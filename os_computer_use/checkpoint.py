@@ -0,0 +1,33 @@
+import hashlib
+import json
+import os
+
+# Seconds to keep a sandbox running after a failed run, so that the run can be resumed
+RESUME_TIMEOUT = 600
+
+
+# Hash of the actions available to the agent, to detect changes between sessions of a run
+def tools_version(tools):
+    return hashlib.sha256(json.dumps(tools, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# Stores the state of a run after every step, so that it can continue after a crash
+class Checkpoint:
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, "checkpoint.json")
+
+    # The saved state, or None if there is no checkpoint
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    # Save a state with the keys instruction, messages, steps, tools_version,
+    # trajectory, sandbox_id, display_profile, log and finished
+    def save(self, state):
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(f"{self.path}.tmp", self.path)
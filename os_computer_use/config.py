@@ -4,6 +4,8 @@ from os_computer_use import providers
 
 grounding_model = providers.OSAtlasProvider()
 # grounding_model = providers.ShowUIProvider()
+# Ground in two passes on smaller images, for high-resolution or dense screens:
+# grounding_model = providers.ZoomProvider(providers.OSAtlasProvider())
 
 # vision_model = providers.FireworksProvider("llama-3.2")
 # vision_model = providers.OpenAIProvider("gpt-4o")
@@ -20,3 +22,9 @@ vision_model = providers.GeminiProvider("gemini-2.0-flash")
 # action_model = providers.MistralProvider("mistral")
 # action_model = providers.GroqProvider("llama-3.3")
 action_model = providers.GeminiProvider("gemini-2.0-flash")
+
+# Try a fast model first and escalate to a stronger model when it struggles:
+# action_model = providers.CascadeProvider(
+#     providers.GroqProvider("llama-3.3"),
+#     providers.AnthropicProvider("claude-3.5-sonnet"),
+# )
@@ -0,0 +1,39 @@
+# Resolution and DPI of the sandbox display when none is set
+DEFAULT_WIDTH = 1024
+DEFAULT_HEIGHT = 768
+BASE_DPI = 96
+
+
+# Display settings chosen when a sandbox is created, used for capture,
+# streaming, the viewer window and mapping grounding coordinates to the screen
+class DisplayProfile:
+
+    def __init__(
+        self, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, dpi_scale=1.0, color_depth=24
+    ):
+        self.width = width
+        self.height = height
+        self.dpi_scale = dpi_scale  # Size of text and icons relative to 96 DPI
+        self.color_depth = color_depth  # Bits per pixel of captured frames (8, 16 or 24)
+
+    @property
+    def resolution(self):
+        return self.width, self.height
+
+    @property
+    def dpi(self):
+        return round(BASE_DPI * self.dpi_scale)
+
+    # Parse a resolution such as "800x600"
+    @staticmethod
+    def parse_resolution(text):
+        width, height = text.lower().split("x")
+        return int(width), int(height)
+
+    # Map a position on an image of the screen, which may have been scaled, to screen pixels
+    def to_screen(self, position, image_size):
+        x, y = position
+        image_width, image_height = image_size
+        x = round(x * self.width / image_width)
+        y = round(y * self.height / image_height)
+        return min(max(0, x), self.width - 1), min(max(0, y), self.height - 1)
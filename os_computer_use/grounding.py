@@ -1,5 +1,8 @@
-from PIL import ImageDraw
+from os_computer_use.logging import logger
+
+from PIL import ImageDraw, ImageFont
 import re
+import time
 
 
 def draw_big_dot(image, coordinates, color="red", radius=12):
@@ -10,6 +13,68 @@ def draw_big_dot(image, coordinates, color="red", radius=12):
     return image
 
 
+# Outline each (x, y, width, height) box and label it with its number
+def draw_marks(image, marks, color="red"):
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    for mark_id, (x, y, width, height) in marks.items():
+        draw.rectangle([x, y, x + width, y + height], outline=color)
+        left, top, right, bottom = draw.textbbox((x, y), str(mark_id), font=font)
+        draw.rectangle([left - 1, top - 1, right + 1, bottom + 1], fill=color)
+        draw.text((x, y), str(mark_id), fill="white", font=font)
+    return image
+
+
+# Words in a query that describe the kind of element rather than its label
+ROLE_WORDS = {
+    "the",
+    "a",
+    "an",
+    "button",
+    "link",
+    "menu",
+    "item",
+    "tab",
+    "icon",
+    "field",
+    "box",
+    "checkbox",
+    "entry",
+    "option",
+}
+
+
+# Lowercase text and reduce it to words separated by single spaces
+def normalize_text(text):
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+# Check whether two (x, y, width, height) boxes overlap
+def overlaps(a, b):
+    return (
+        a[0] < b[0] + b[2]
+        and b[0] < a[0] + a[2]
+        and a[1] < b[1] + b[3]
+        and b[1] < a[1] + a[3]
+    )
+
+
+# The center of the best (score, box) match, or None if it scores below the threshold
+# or if a match elsewhere on the screen scores within the margin of it.
+# The matches must be sorted from best to worst.
+def best_unambiguous_match(matches, threshold, margin):
+    if not matches or matches[0][0] < threshold:
+        return None
+    best_score, box = matches[0]
+    for score, other in matches[1:]:
+        if score < best_score - margin:
+            break
+        if not overlaps(box, other):
+            return None
+    x, y, width, height = box
+    return x + width // 2, y + height // 2
+
+
 def extract_bbox_midpoint(bbox_response):
     match = re.search(r"<\|box_start\|>(.*?)<\|box_end\|>", bbox_response)
     inner_text = match.group(1) if match else bbox_response
@@ -20,3 +85,44 @@ def extract_bbox_midpoint(bbox_response):
         return (numbers[0] + numbers[2]) // 2, (numbers[1] + numbers[3]) // 2
     else:
         return None
+
+
+# Tries each grounding provider in turn until one of them locates the element.
+# A provider that fails is skipped for that call.
+class TieredGrounding:
+
+    def __init__(self, *tiers):
+        self.tiers = tiers
+        # Calls, hits and total time in seconds for each tier
+        self.stats = {self.tier_name(tier): [0, 0, 0.0] for tier in tiers}
+
+    @staticmethod
+    def tier_name(tier):
+        return tier.__class__.__name__
+
+    def call(self, prompt, image_data):
+        for tier in self.tiers:
+            start = time.monotonic()
+            try:
+                position = tier.call(prompt, image_data)
+            except Exception as e:
+                logger.log(f"{self.tier_name(tier)} failed: {e}", "gray")
+                position = None
+            stats = self.stats[self.tier_name(tier)]
+            stats[0] += 1
+            stats[1] += 1 if position else 0
+            stats[2] += time.monotonic() - start
+            if position:
+                return position
+        return None
+
+    # Summarize the hit rate and latency of each tier
+    def report(self):
+        lines = []
+        for name, (calls, hits, seconds) in self.stats.items():
+            if calls:
+                lines.append(
+                    f"{name}: {hits}/{calls} hits ({hits / calls:.0%}), "
+                    f"{seconds / calls * 1000:.0f} ms per call"
+                )
+        return "\n".join(lines)
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import atexit
+import threading
+
+# Maximum number of queued writes before callers have to wait
+IO_QUEUE_SIZE = 32
+
+
+# Writes run artifacts in the background so they don't delay the agent
+class IOWorker:
+
+    def __init__(self, max_pending=IO_QUEUE_SIZE):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="io")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.pending = set()  # Writes that haven't finished yet
+        self.lock = threading.Lock()
+
+    # Queue a write, blocking while the queue is full
+    def submit(self, func, *args):
+        self.slots.acquire()
+        future = self.executor.submit(func, *args)
+        with self.lock:
+            self.pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self.lock:
+            self.pending.discard(future)
+        self.slots.release()
+        if future.exception():
+            print(f"Error writing output: {future.exception()}")
+
+    # Wait for all queued writes to finish
+    def flush(self):
+        with self.lock:
+            pending = list(self.pending)
+        wait(pending)
+
+
+# Create a global I/O worker
+io_worker = IOWorker()
+atexit.register(io_worker.flush)
@@ -0,0 +1,63 @@
+from os_computer_use.logging import logger
+
+import threading
+import time
+
+# Sandbox lifetime requested on every extension (seconds)
+SANDBOX_TIMEOUT = 60
+# Minimum remaining lifetime to keep before extending again (seconds)
+KEEPALIVE_MARGIN = 20
+# Never extend more often than this (seconds)
+KEEPALIVE_MIN_INTERVAL = 5
+
+
+# Keeps a sandbox alive from a background thread so the agent loop never blocks on it
+class Keepalive:
+
+    def __init__(self, sandbox, timeout=SANDBOX_TIMEOUT):
+        self.sandbox = sandbox
+        self.timeout = timeout
+        self.step_latency = 0  # Slowest agent step observed so far
+        self.expires_at = None  # Estimated end of the sandbox lifetime
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    # Record how long an agent step took, so that a slow step can't outlive the sandbox
+    def record_step(self, seconds):
+        self.step_latency = max(self.step_latency, seconds)
+
+    # Request a lifetime long enough to cover the slowest step seen so far
+    def extend(self):
+        timeout = max(self.timeout, int(3 * self.step_latency))
+        self.sandbox.set_timeout(timeout)
+        self.expires_at = time.monotonic() + timeout
+
+    # Time to wait before the next extension
+    def next_delay(self):
+        margin = max(KEEPALIVE_MARGIN, 2 * self.step_latency)
+        remaining = self.expires_at - time.monotonic()
+        return max(KEEPALIVE_MIN_INTERVAL, remaining - margin)
+
+    def start(self):
+        if self.thread:
+            return
+        self.stop_event.clear()
+        self.extend()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.thread:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+
+    def _run(self):
+        while not self.stop_event.wait(self.next_delay()):
+            try:
+                self.extend()
+            except Exception as e:
+                logger.log(f"keepalive failed: {e}", "gray")
+                # Retry soon rather than waiting for the next scheduled extension
+                self.expires_at = time.monotonic()
@@ -1,8 +1,10 @@
 from openai import OpenAI
 from anthropic import Anthropic
+from os_computer_use.transport import get_http_client
 
 from PIL import Image
 import io
+import os
 import json
 import re
 import base64
@@ -67,6 +69,21 @@ class LLMProvider:
             "parameters": parameters,
         }
 
+    # Detect the media type of an image and base64-encode it
+    @staticmethod
+    def encode_image(image_data: bytes):
+        # Use Pillow to detect the image type
+        image_type = "png"  # Default to PNG if detection fails
+        try:
+            with Image.open(io.BytesIO(image_data)) as img:
+                image_type = img.format.lower()
+        except Exception as e:
+            print(f"Error detecting image type: {e}")
+
+        # Base64-encode the raw image bytes.
+        encoded = base64.b64encode(image_data).decode("utf-8")
+        return f"image/{image_type}", encoded
+
     # Wrap a content block in a text or an image object
     def wrap_block(self, block):
         if isinstance(block, bytes):
@@ -103,7 +120,11 @@ class LLMProvider:
 class OpenAIBaseProvider(LLMProvider):
 
     def create_client(self):
-        return OpenAI(base_url=self.base_url, api_key=self.api_key).chat.completions
+        return OpenAI(
+            base_url=self.base_url,
+            api_key=self.api_key,
+            http_client=get_http_client(self.base_url),
+        ).chat.completions
 
     def create_function_def(self, name, details, properties, required):
         return {
@@ -120,19 +141,10 @@ class OpenAIBaseProvider(LLMProvider):
         }
 
     def create_image_block(self, image_data: bytes):
-        # Use Pillow to detect the image type
-        image_type = "png"  # Default to PNG if detection fails
-        try:
-            with Image.open(io.BytesIO(image_data)) as img:
-                image_type = img.format.lower()
-        except Exception as e:
-            print(f"Error detecting image type: {e}")
-
-        # Base64-encode the raw image bytes.
-        encoded = base64.b64encode(image_data).decode("utf-8")
+        media_type, encoded = self.encode_image(image_data)
         return {
             "type": "image_url",
-            "image_url": {"url": f"data:image/{image_type};base64,{encoded}"},
+            "image_url": {"url": f"data:{media_type};base64,{encoded}"},
         }
 
     def call(self, messages, functions=None):
@@ -174,8 +186,14 @@ class OpenAIBaseProvider(LLMProvider):
 
 class AnthropicBaseProvider(LLMProvider):
 
+    base_url = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
+
     def create_client(self):
-        return Anthropic(api_key=self.api_key).messages
+        return Anthropic(
+            base_url=self.base_url,
+            api_key=self.api_key,
+            http_client=get_http_client(self.base_url),
+        ).messages
 
     def create_function_def(self, name, details, properties, required):
         return {
@@ -188,14 +206,11 @@ class AnthropicBaseProvider(LLMProvider):
             },
         }
 
-    def create_image_block(self, base64_image):
+    def create_image_block(self, image_data: bytes):
+        media_type, encoded = self.encode_image(image_data)
         return {
             "type": "image",
-            "source": {
-                "type": "base64",
-                "media_type": "image/png",
-                "data": base64_image,
-            },
+            "source": {"type": "base64", "media_type": media_type, "data": encoded},
         }
 
     def call(self, messages, functions=None):
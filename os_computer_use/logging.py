@@ -1,3 +1,5 @@
+from os_computer_use.io_worker import io_worker
+
 import os
 
 
@@ -34,6 +36,7 @@ class Logger:
         self.logs = []  # Output logs
         self.log_file = None  # Output log file
         self.log_file_template = None  # Store the log file template
+        self.write_scheduled = False  # Whether a log file write is queued
 
         # Load the HTML template when the logger is initialized
         try:
@@ -45,6 +48,11 @@ class Logger:
         except Exception as e:
             print(f"Warning: Could not load log template: {e}")
 
+    # Start an empty log, without a log file, for the next task
+    def reset(self):
+        self.logs = []
+        self.log_file = None
+
     # Print to the terminal in color
     def print_colored(self, message, color=None):
         # Check if the color is valid and fetch its ANSI code
@@ -77,10 +85,16 @@ class Logger:
             self.print_colored(text, color)
         # Write to the log file
         self.logs.append({"text": text, "color": color})
-        if self.log_file:
-            self.write_log_file(self.logs, self.log_file)
+        if self.log_file and not self.write_scheduled:
+            self.write_scheduled = True
+            io_worker.submit(self.flush_log_file)
         return text
 
+    # Write all entries logged so far, from the I/O worker
+    def flush_log_file(self):
+        self.write_scheduled = False
+        self.write_log_file(list(self.logs), self.log_file)
+
 
 # Create a global logger
 logger = Logger()
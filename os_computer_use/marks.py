@@ -0,0 +1,119 @@
+from collections import deque
+from PIL import ImageFilter
+import numpy as np
+
+# Brightness difference that counts as an edge
+EDGE_THRESHOLD = 40
+# Edges straighter and longer than this are window borders or separators (pixels)
+LINE_LENGTH = 120
+# Size of the grid cells that edges are grouped into (pixels)
+CELL_SIZE = 4
+# Smallest and largest elements to mark (pixels)
+MIN_ELEMENT_SIZE = 10
+MAX_ELEMENT_FRACTION = 0.4
+# Most marks to draw on one frame
+MAX_MARKS = 200
+# Accessibility roles that are merged into the detected elements
+MARKED_ROLES = {
+    "push button",
+    "toggle button",
+    "check box",
+    "radio button",
+    "menu item",
+    "page tab",
+    "link",
+    "entry",
+    "combo box",
+    "icon",
+}
+
+
+# Mask of pixels that lie on a straight run of at least `length` edge pixels along an axis
+def long_runs(edges, length, axis):
+    edges = np.moveaxis(edges, axis, -1)
+    padded = np.pad(edges.astype(np.int32), [(0, 0), (1, 0)])
+    sums = np.cumsum(padded, axis=-1)
+    # A window starting at each position is full when all of its pixels are edges
+    full = (sums[:, length:] - sums[:, :-length]) == length
+    starts = np.pad(full.astype(np.int32), [(0, 0), (length, length - 1)])
+    covered = np.cumsum(starts, axis=-1)
+    mask = (covered[:, length:] - covered[:, :-length]) > 0
+    return np.moveaxis(mask, -1, axis)
+
+
+# Label connected cells and return the bounding box of each group as (x, y, width, height)
+def connected_boxes(cells):
+    rows, cols = cells.shape
+    seen = np.zeros_like(cells)
+    boxes = []
+    for row, col in zip(*np.nonzero(cells)):
+        if seen[row, col]:
+            continue
+        seen[row, col] = True
+        queue = deque([(row, col)])
+        top, left, bottom, right = row, col, row, col
+        while queue:
+            r, c = queue.popleft()
+            top, bottom = min(top, r), max(bottom, r)
+            left, right = min(left, c), max(right, c)
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if 0 <= nr < rows and 0 <= nc < cols and cells[nr, nc] and not seen[nr, nc]:
+                    seen[nr, nc] = True
+                    queue.append((nr, nc))
+        boxes.append(
+            (
+                int(left) * CELL_SIZE,
+                int(top) * CELL_SIZE,
+                int(right - left + 1) * CELL_SIZE,
+                int(bottom - top + 1) * CELL_SIZE,
+            )
+        )
+    return boxes
+
+
+def intersection_over_union(a, b):
+    width = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+    height = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0
+    intersection = width * height
+    return intersection / (a[2] * a[3] + b[2] * b[3] - intersection)
+
+
+# Find likely UI elements in a screenshot and number them in reading order
+def detect_elements(image, accessibility_elements=()):
+    gray = image.convert("L")
+    edges = np.asarray(gray.filter(ImageFilter.FIND_EDGES)) > EDGE_THRESHOLD
+
+    # Remove borders and separators, which would otherwise join whole windows together
+    edges &= ~long_runs(edges, LINE_LENGTH, axis=1)
+    edges &= ~long_runs(edges, LINE_LENGTH, axis=0)
+
+    # Group edges into cells and bridge small gaps, e.g. between the letters of a label
+    rows, cols = edges.shape[0] // CELL_SIZE, edges.shape[1] // CELL_SIZE
+    cells = (
+        edges[: rows * CELL_SIZE, : cols * CELL_SIZE]
+        .reshape(rows, CELL_SIZE, cols, CELL_SIZE)
+        .any(axis=(1, 3))
+    )
+    cells[:, 1:] |= cells[:, :-1].copy()
+
+    max_width = image.width * MAX_ELEMENT_FRACTION
+    max_height = image.height * MAX_ELEMENT_FRACTION
+    boxes = [
+        box
+        for box in connected_boxes(cells)
+        if MIN_ELEMENT_SIZE <= box[2] <= max_width
+        and MIN_ELEMENT_SIZE <= box[3] <= max_height
+    ]
+
+    # Prefer the exact extents of interactive elements from the accessibility tree
+    for name, role, x, y, width, height in accessibility_elements:
+        if role in MARKED_ROLES:
+            element = (x, y, width, height)
+            boxes = [box for box in boxes if intersection_over_union(box, element) < 0.5]
+            boxes.append(element)
+
+    boxes.sort(key=lambda box: (box[1] // (2 * CELL_SIZE), box[0]))
+    return {i + 1: box for i, box in enumerate(boxes[:MAX_MARKS])}
+
@@ -0,0 +1,100 @@
+from os_computer_use.grounding import (
+    normalize_text,
+    best_unambiguous_match,
+    ROLE_WORDS,
+)
+from os_computer_use.logging import logger
+
+from difflib import SequenceMatcher
+from PIL import Image
+import hashlib
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+# Minimum similarity between the query and the text on the screen
+MATCH_THRESHOLD = 0.9
+# Minimum Tesseract confidence for a word to be matched
+MIN_CONFIDENCE = 60
+# A different text box scoring this close to the best match makes the match ambiguous
+AMBIGUITY_MARGIN = 0.05
+
+
+class OCRProvider:
+    """
+    The OCR provider finds visible text on the screen using Tesseract.
+    """
+
+    def __init__(self):
+        self.available = pytesseract is not None
+        if not self.available:
+            print("pytesseract is not installed, OCR grounding is disabled")
+        self.frame = None  # Hash of the frame the index belongs to
+        self.lines = []  # Lines of words as (text, x, y, width, height)
+
+    # Run OCR on a frame, reusing the index while the screen is unchanged
+    def get_lines(self, image_data):
+        with open(image_data, "rb") as f:
+            frame = hashlib.sha256(f.read()).hexdigest()
+        if frame == self.frame:
+            return self.lines
+
+        data = pytesseract.image_to_data(
+            Image.open(image_data), output_type=pytesseract.Output.DICT
+        )
+        lines = {}
+        for i, text in enumerate(data["text"]):
+            text = normalize_text(text)
+            if text and float(data["conf"][i]) >= MIN_CONFIDENCE:
+                key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+                box = (data["left"][i], data["top"][i], data["width"][i], data["height"][i])
+                lines.setdefault(key, []).append((text, *box))
+
+        self.lines = list(lines.values())
+        self.frame = frame
+        return self.lines
+
+    # The lines of text on a frame, or nothing if Tesseract can't run
+    def visible_lines(self, image_data):
+        try:
+            return self.get_lines(image_data)
+        except Exception as e:
+            logger.log(f"OCR is not available: {e}", "gray")
+            self.available = False
+            return []
+
+    # Every run of consecutive words in a line with about as many words as the query
+    def spans(self, lines, length):
+        for words in lines:
+            for size in range(max(1, length - 1), length + 2):
+                for start in range(len(words) - size + 1):
+                    span = words[start : start + size]
+                    x = min(word[1] for word in span)
+                    y = min(word[2] for word in span)
+                    right = max(word[1] + word[3] for word in span)
+                    bottom = max(word[2] + word[4] for word in span)
+                    text = " ".join(word[0] for word in span)
+                    yield text, (x, y, right - x, bottom - y)
+
+    def call(self, prompt, image_data):
+        if not self.available:
+            return None
+
+        # Match the label without words like "button" that aren't shown on the screen
+        query = normalize_text(prompt)
+        words = [word for word in query.split() if word not in ROLE_WORDS]
+        target = " ".join(words) or query
+        if not target:
+            return None
+
+        matches = sorted(
+            (
+                (SequenceMatcher(None, target, text).ratio(), box)
+                for text, box in self.spans(self.visible_lines(image_data), len(words) or 1)
+            ),
+            key=lambda match: -match[0],
+        )
+        # Give up if the same text appears elsewhere on the screen
+        return best_unambiguous_match(matches, MATCH_THRESHOLD, AMBIGUITY_MARGIN)
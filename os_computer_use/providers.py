@@ -7,6 +7,8 @@ from os_computer_use.llm_provider import (
 )
 from os_computer_use.osatlas_provider import OSAtlasProvider
 from os_computer_use.showui_provider import ShowUIProvider
+from os_computer_use.zoom_provider import ZoomProvider
+from os_computer_use.cascade_provider import CascadeProvider
 
 # Load environment variables from .env file
 load_dotenv()
@@ -54,6 +56,7 @@ class GeminiProvider(OpenAIBaseProvider):
 
 
 class AnthropicProvider(AnthropicBaseProvider):
+    base_url = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
     api_key = os.getenv("ANTHROPIC_API_KEY")
     aliases = {
         "claude-3.5-sonnet": "claude-3-5-sonnet-20241022",
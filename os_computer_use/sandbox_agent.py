@@ -1,17 +1,62 @@
 from os_computer_use.config import vision_model, action_model, grounding_model
 from os_computer_use.llm_provider import Message
 from os_computer_use.logging import logger
-from os_computer_use.grounding import draw_big_dot
+from os_computer_use.grounding import draw_big_dot, draw_marks, TieredGrounding
+from os_computer_use.accessibility_provider import AccessibilityProvider
+from os_computer_use.ocr_provider import OCRProvider
+from os_computer_use.io_worker import io_worker
+from os_computer_use.keepalive import Keepalive
+from os_computer_use.settle import SettleDetector
+from os_computer_use.speculation import Speculation
+from os_computer_use.marks import detect_elements
+from os_computer_use.trajectory import frame_hash, frames_match
+from os_computer_use.archive import RunArchive
+from os_computer_use.capture import RegionCapture
+from os_computer_use.checkpoint import Checkpoint, tools_version
+from os_computer_use.display import DisplayProfile
 
+import copy
 import shlex
+import shutil
 import os
 import tempfile
+import threading
+import time
 from PIL import Image
+import hashlib
+import io
 import json
 
 TYPING_DELAY_MS = 12
 TYPING_GROUP_SIZE = 50
 
+SYSTEM_PROMPT = "You are an AI assistant with computer use abilities."
+
+VISION_PROMPT = (
+    "This image shows the current display of the computer. Please respond in the following format:\n"
+    "The objective is: [put the objective here]\n"
+    "On the screen, I see: [an extensive list of everything that might be relevant to the objective including windows, icons, menus, apps, and UI elements]\n"
+    "This means the objective is: [complete|not complete]\n\n"
+    "(Only continue if the objective is not complete.)\n"
+    "The next step is to [click|type|run the shell command] [put the next single step here] in order to [put what you expect to happen here]."
+)
+
+# Used when one model both describes the screen and chooses the actions
+SINGLE_CALL_PROMPT = (
+    VISION_PROMPT
+    + "\n\nThen use tool calls to take these actions, or use the stop command if the objective is complete."
+)
+
+# Added to the prompts when the screenshot shows numbered marks
+MARKS_PROMPT = (
+    "\n\nUI elements on the screenshot are outlined and numbered. "
+    "To click an element with a number, use click_mark with that number. "
+    "Otherwise, describe the element to click."
+)
+
+# Number of marked frames to remember
+MARKED_FRAMES = 4
+
 tools = {
     "stop": {
         "description": "Indicate that the task has been completed.",
@@ -20,28 +65,126 @@ tools = {
 }
 
 
+# Write PNG bytes, a PIL image, or a function that draws one to a file and the run archive
+def write_image(image, filepath, archive=None):
+    if callable(image):
+        image = image()
+    if isinstance(image, Image.Image):
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        image = buffer.getvalue()
+    with open(filepath, "wb") as f:
+        f.write(image)
+    if archive:
+        archive.add_frame(image, filepath)
+
+
+# Check whether two providers call the same model
+def is_same_model(a, b):
+    return type(a) is type(b) and getattr(a, "model", None) == getattr(b, "model", None)
+
+
 class SandboxAgent:
 
-    def __init__(self, sandbox, output_dir=".", save_logs=True):
+    def __init__(
+        self,
+        sandbox,
+        output_dir=".",
+        save_logs=True,
+        save_locations=True,
+        speculative=False,
+        single_call=None,
+        set_of_marks=False,
+        trajectories=None,
+        capture_format=None,
+    ):
         super().__init__()
+        logger.reset()  # Each task has its own log
         self.messages = []  # Agent memory
         self.sandbox = sandbox  # E2B sandbox
         self.latest_screenshot = None  # Most recent PNG of the screen
+        self.latest_frame = None  # Screenshot the model last saw
         self.image_counter = 0  # Current screenshot number
-        self.tmp_dir = tempfile.mkdtemp()  # Folder to store screenshots
+        self.tmp_dir = tempfile.mkdtemp()  # Folder to store screenshots during the run
+        self.save_locations = save_locations  # Save screenshots annotated with clicks
+        self.keepalive = Keepalive(sandbox)  # Stops the sandbox from timing out
+        # Resolution and color depth of the screen
+        self.display_profile = (
+            getattr(sandbox, "display_profile", None) or DisplayProfile()
+        )
+        # Transfer only the changed part of the screen, if a capture format
+        # or a reduced color depth is set
+        color_depth = self.display_profile.color_depth
+        self.camera = (
+            RegionCapture(sandbox, capture_format or "PNG", color_depth=color_depth)
+            if capture_format or color_depth < 24
+            else sandbox
+        )
+        # Waits for the screen after actions
+        self.settler = SettleDetector(sandbox, self.camera)
+
+        # Look for elements in the accessibility tree and the text on the screen
+        # before asking the grounding model
+        self.accessibility = AccessibilityProvider(sandbox)
+        self.grounding = TieredGrounding(
+            self.accessibility, OCRProvider(), grounding_model
+        )
+
+        # Number the elements on each screenshot so the model can click them by id
+        self.set_of_marks = set_of_marks
+        self.marked_frames = {}  # Frame hash -> (marked PNG, marks)
+        self.marks_lock = threading.Lock()
+        self.marks = {}  # Marks on the frame the model last saw
+
+        # Successful runs to replay, and the steps of this run
+        self.trajectories = trajectories
+        self.trajectory = []
+        self.last_position = None  # Where the latest click action clicked
+
+        # Sandbox methods and names of the click actions, used to repeat recorded clicks
+        self.click_commands = {
+            "click": ("left_click", "click"),
+            "double_click": ("double_click", "double click"),
+            "right_click": ("right_click", "right click"),
+            "click_mark": ("left_click", "click"),
+        }
+
+        # Actions available to this agent
+        self.tools = dict(tools)
+        if not set_of_marks:
+            del self.tools["click_mark"]
 
-        # Set the log file location
+        # Make one model call per step when the same model handles vision and actions
+        if single_call is None:
+            single_call = is_same_model(vision_model, action_model)
+        self.single_call = single_call
+        self.analyze = self.decide if single_call else self.describe_screenshot
+
+        # Analyzes the next screen in the background while actions finish
+        self.speculation = (
+            Speculation(self.camera, self.settler, self.analyze)
+            if speculative
+            else None
+        )
+
+        # Set the log file location, keep the screenshots in a run archive,
+        # and save the state of the run after every step
+        self.archive = None
+        self.checkpoint = None
+        self.instruction = None
         if save_logs:
             logger.log_file = f"{output_dir}/log.html"
+            self.archive = RunArchive(f"{output_dir}/run.archive")
+            self.checkpoint = Checkpoint(output_dir)
 
         print("The agent will use the following actions:")
-        for action, details in tools.items():
+        for action, details in self.tools.items():
             param_str = ", ".join(details.get("params").keys())
             print(f"- {action}({param_str})")
 
     def call_function(self, name, arguments):
 
-        func_impl = getattr(self, name.lower()) if name.lower() in tools else None
+        func_impl = getattr(self, name.lower()) if name.lower() in self.tools else None
         if func_impl:
             try:
                 result = func_impl(**arguments) if arguments else func_impl()
@@ -59,24 +202,28 @@ class SandboxAgent:
 
         return decorator
 
-    def save_image(self, image, prefix="image"):
+    # Path of the next image in the screenshot folder
+    def image_path(self, prefix="image"):
         self.image_counter += 1
-        filename = f"{prefix}_{self.image_counter}.png"
-        filepath = os.path.join(self.tmp_dir, filename)
-        if isinstance(image, Image.Image):
-            image.save(filepath)
-        else:
-            with open(filepath, "wb") as f:
-                f.write(image)
-        return filepath
+        return os.path.join(self.tmp_dir, f"{prefix}_{self.image_counter}.png")
+
+    # Queue an image to be written to the screenshot folder
+    def save_image(self, image, prefix="image"):
+        filepath = self.image_path(prefix)
+        return filepath, io_worker.submit(write_image, image, filepath, self.archive)
 
     def screenshot(self):
-        file = self.sandbox.screenshot()
-        filename = self.save_image(file, "screenshot")
+        file = self.camera.screenshot()
+        # The grounding tiers read the screenshot from disk, so it is written
+        # right away instead of waiting behind the queued writes
+        filename = self.image_path("screenshot")
+        with open(filename, "wb") as f:
+            f.write(file)
+        if self.archive:
+            io_worker.submit(self.archive.add_frame, file, filename)
         logger.log(f"screenshot {filename}", "gray")
         self.latest_screenshot = filename
-        with open(filename, "rb") as image_file:
-            return image_file.read()
+        return file
 
     @tool(
         description="Run a shell command and return the result.",
@@ -118,15 +265,29 @@ class SandboxAgent:
 
     def click_element(self, query, click_command, action_name="click"):
         """Base method for all click operations"""
-        self.screenshot()
-        position = grounding_model.call(query, self.latest_screenshot)
-        dot_image = draw_big_dot(Image.open(self.latest_screenshot), position)
-        filepath = self.save_image(dot_image, "location")
-        logger.log(f"{action_name} {filepath})", "gray")
+        screenshot = self.screenshot()
+        position = self.grounding.call(query, self.latest_screenshot)
+        if self.save_locations:
+            filepath, _ = self.save_image(
+                lambda: draw_big_dot(Image.open(io.BytesIO(screenshot)), position),
+                "location",
+            )
+            logger.log(f"{action_name} {filepath})", "gray")
+
+        if position:
+            position = self.to_screen(position, screenshot)
+        return self.click_at(position, click_command, action_name)
 
+    # Map a position on a screenshot to screen pixels
+    def to_screen(self, position, screenshot):
+        with Image.open(io.BytesIO(screenshot)) as image:
+            return self.display_profile.to_screen(position, image.size)
+
+    def click_at(self, position, click_command, action_name="click"):
         x, y = position
         self.sandbox.move_mouse(x, y)
         click_command()
+        self.last_position = (x, y)
         return f"The mouse has {action_name}ed."
 
     @tool(
@@ -150,67 +311,274 @@ class SandboxAgent:
     def right_click(self, query):
         return self.click_element(query, self.sandbox.right_click, "right click")
 
-    def append_screenshot(self):
+    def describe_screenshot(self, messages, screenshot):
         return vision_model.call(
+            [*messages, self.screen_message(screenshot, VISION_PROMPT)]
+        )
+
+    # Describe the screen and choose the next actions in a single call
+    def decide(self, messages, screenshot):
+        return action_model.call(
             [
+                Message(SYSTEM_PROMPT, role="system"),
+                *messages,
+                self.screen_message(screenshot, SINGLE_CALL_PROMPT),
+            ],
+            self.tools,
+        )
+
+    @tool(
+        description="Click on a numbered element on the screenshot.",
+        params={"id": "Number of the element to click"},
+    )
+    def click_mark(self, id):
+        mark = self.marks.get(int(id))
+        if not mark:
+            return f"There is no element numbered {id} on the screen."
+        x, y, width, height = mark
+        position = self.to_screen((x + width // 2, y + height // 2), self.latest_frame)
+        return self.click_at(position, self.sandbox.left_click)
+
+    # Detect and number the elements on a screenshot, remembering recent frames
+    def mark_screenshot(self, screenshot):
+        key = hashlib.sha256(screenshot).digest()
+        with self.marks_lock:
+            if key in self.marked_frames:
+                return self.marked_frames[key]
+
+        image = Image.open(io.BytesIO(screenshot)).convert("RGB")
+        marks = detect_elements(image, self.accessibility.visible_elements(screenshot))
+        marked = io.BytesIO()
+        draw_marks(image, marks).save(marked, format="PNG")
+
+        with self.marks_lock:
+            if len(self.marked_frames) >= MARKED_FRAMES:
+                del self.marked_frames[next(iter(self.marked_frames))]
+            self.marked_frames[key] = (marked.getvalue(), marks)
+        return self.marked_frames[key]
+
+    # The image and prompt that show a screenshot to the model
+    def screen_message(self, screenshot, prompt):
+        if self.set_of_marks:
+            return Message(
+                [self.mark_screenshot(screenshot)[0], prompt + MARKS_PROMPT], role="user"
+            )
+        return Message([screenshot, prompt], role="user")
+
+    def append_screenshot(self):
+        if self.speculation:
+            self.speculation.wait_until_settled()
+        screenshot = self.screenshot()
+
+        # Tell cascading models when the last actions didn't change the screen.
+        # The model that analyzes the screen is only told when it is actually called,
+        # and a speculative analysis from its fast model is discarded.
+        unchanged = screenshot == self.latest_frame
+        self.latest_frame = screenshot
+        analyzer = action_model if self.single_call else vision_model
+        escalate = unchanged and hasattr(analyzer, "escalate_next")
+        if unchanged and not self.single_call and hasattr(action_model, "escalate_next"):
+            action_model.escalate_next = True
+
+        # Use the speculative analysis if the screen hasn't changed since it was made
+        analysis = None
+        if self.speculation and escalate:
+            self.speculation.cancel()
+        elif self.speculation:
+            analysis = self.speculation.take(self.messages, screenshot)
+        if analysis is None:
+            if escalate:
+                analyzer.escalate_next = True
+            analysis = self.analyze(self.messages, screenshot)
+        # Only the analysis that is used counts towards the cascade's escalation rate
+        if hasattr(analyzer, "keep"):
+            analyzer.keep(analysis)
+
+        if self.set_of_marks:
+            self.marks = self.mark_screenshot(screenshot)[1]
+        return analysis
+
+    # Choose the next actions based on a separate description of the screen
+    def plan_actions(self):
+        response = action_model.call(
+            [
+                Message(SYSTEM_PROMPT, role="system"),
                 *self.messages,
+                Message(logger.log(f"THOUGHT: {self.append_screenshot()}", "green")),
                 Message(
-                    [
-                        self.screenshot(),
-                        "This image shows the current display of the computer. Please respond in the following format:\n"
-                        "The objective is: [put the objective here]\n"
-                        "On the screen, I see: [an extensive list of everything that might be relevant to the objective including windows, icons, menus, apps, and UI elements]\n"
-                        "This means the objective is: [complete|not complete]\n\n"
-                        "(Only continue if the objective is not complete.)\n"
-                        "The next step is to [click|type|run the shell command] [put the next single step here] in order to [put what you expect to happen here].",
-                    ],
-                    role="user",
+                    "I will now use tool calls to take these actions, or use the stop command if the objective is complete.",
                 ),
-            ]
+            ],
+            self.tools,
         )
+        if hasattr(action_model, "keep"):
+            action_model.keep(response)
+        return response
+
+    # Run an instruction, or continue the run saved in a checkpoint state.
+    # Reattached means the sandbox is the one the checkpoint was saved from.
+    def run(self, instruction, state=None, reattached=False):
+
+        self.instruction = instruction
+        if not state:
+            self.messages.append(Message(f"OBJECTIVE: {instruction}"))
+            logger.log(f"USER: {instruction}", print=False)
+
+        # Stop the sandbox from timing out
+        self.keepalive.start()
+        try:
+            steps = None
+            if state:
+                self.restore(state, reattached)
+            elif self.trajectories:
+                # Repeat a previous successful run of the same instruction if there is one
+                steps = self.trajectories.load(instruction)
+            if steps and self.replay(steps):
+                logger.log("REPLAY: finished the recorded run", "gray")
+            elif self.run_steps() and self.trajectories:
+                self.trajectories.save(instruction, self.trajectory)
+            self.save_checkpoint(finished=True)
+        finally:
+            self.keepalive.stop()
+            if self.speculation:
+                self.speculation.cancel()
+            self.report()
+            io_worker.flush()
+
+    # Queue a copy of the state of the run to be written to the checkpoint
+    def save_checkpoint(self, finished=False):
+        if not self.checkpoint:
+            return
+        state = {
+            "instruction": self.instruction,
+            "messages": self.messages,
+            "steps": len(self.trajectory),
+            "tools_version": tools_version(self.tools),
+            "trajectory": self.trajectory,
+            "sandbox_id": getattr(self.sandbox, "sandbox_id", None),
+            "display_profile": vars(self.display_profile),
+            "log": logger.logs,
+            "finished": finished,
+        }
+        io_worker.submit(self.checkpoint.save, copy.deepcopy(state))
+
+    # Continue from a checkpoint, first repeating its actions if the sandbox is new
+    def restore(self, state, reattached):
+        # Keep the log of the earlier sessions of the run
+        earlier_log = state["log"]
+        if self.archive and self.archive.log:
+            earlier_log, self.archive.log = self.archive.log, []
+        logger.logs[:0] = earlier_log
 
-    def run(self, instruction):
+        if state["tools_version"] != tools_version(self.tools):
+            logger.log("RESUME: the actions have changed since the checkpoint", "gray")
+        if not reattached:
+            logger.log("RESUME: repeating the recorded actions on a new sandbox", "gray")
+            if not self.replay(state["trajectory"]):
+                logger.log("RESUME: continuing from the current screen", "gray")
 
-        self.messages.append(Message(f"OBJECTIVE: {instruction}"))
-        logger.log(f"USER: {instruction}", print=False)
+        self.messages = state["messages"]
+        self.trajectory = state["trajectory"]
+        logger.log(f"RESUME: continuing after step {state['steps']}", "gray")
 
+    # Save the run archive and delete the screenshot folder
+    def close(self):
+        if self.speculation:
+            self.speculation.close()
+        io_worker.flush()
+        if self.archive:
+            self.archive.close(logger.logs, self.trajectory)
+            self.archive = None
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    # Log statistics about the run
+    def report(self):
+        grounding_report = self.grounding.report()
+        if grounding_report:
+            logger.log(f"GROUNDING:\n{grounding_report}", "gray")
+        for model in {id(m): m for m in (vision_model, action_model)}.values():
+            model_report = model.report() if hasattr(model, "report") else ""
+            if model_report:
+                logger.log(f"CASCADE: {model_report}", "gray")
+
+    # Run a tool call, recording it in the message history and the trajectory.
+    # Clicks with a known position are repeated without grounding.
+    def execute(self, tool_call, position=None, settle=True):
+        name, parameters = tool_call.get("name"), tool_call.get("parameters")
+        # Print the tool-call in an easily readable format
+        logger.log(f"ACTION: {name} {str(parameters)}", "red")
+        # Write the tool-call to the message history using the same format used by the model
+        self.messages.append(Message(json.dumps(tool_call)))
+
+        self.last_position = None
+        if position and name in self.click_commands:
+            command, action_name = self.click_commands[name]
+            result = self.click_at(position, getattr(self.sandbox, command), action_name)
+        else:
+            result = self.call_function(name, parameters)
+        self.trajectory[-1]["tool_calls"].append(
+            {"name": name, "parameters": parameters, "position": self.last_position}
+        )
+
+        if settle:
+            self.settler.wait(name)
+
+        self.messages.append(Message(logger.log(f"OBSERVATION: {result}", "yellow")))
+
+    # Repeat the steps of a recorded run while the screen matches the recording
+    def replay(self, steps):
+        logger.log(f"REPLAY: repeating {len(steps)} recorded steps", "gray")
+        for step in steps:
+            screenshot = self.screenshot()
+            if not frames_match(frame_hash(screenshot), step["frame"]):
+                logger.log("REPLAY: the screen differs from the recorded run", "gray")
+                return False
+            self.trajectory.append({"frame": frame_hash(screenshot), "tool_calls": []})
+            for tool_call in step["tool_calls"]:
+                self.execute(
+                    {
+                        "type": "function",
+                        "name": tool_call["name"],
+                        "parameters": tool_call["parameters"],
+                    },
+                    tool_call.get("position"),
+                )
+        return True
+
+    # Let the model operate the computer until it stops, and return whether it completed the objective
+    def run_steps(self):
         should_continue = True
         while should_continue:
-            # Stop the sandbox from timing out
-            self.sandbox.set_timeout(60)
-
-            content, tool_calls = action_model.call(
-                [
-                    Message(
-                        "You are an AI assistant with computer use abilities.",
-                        role="system",
-                    ),
-                    *self.messages,
-                    Message(
-                        logger.log(f"THOUGHT: {self.append_screenshot()}", "green")
-                    ),
-                    Message(
-                        "I will now use tool calls to take these actions, or use the stop command if the objective is complete.",
-                    ),
-                ],
-                tools,
-            )
+            step_start = time.monotonic()
+
+            if self.single_call:
+                content, tool_calls = self.append_screenshot()
+            else:
+                content, tool_calls = self.plan_actions()
 
             if content:
                 self.messages.append(Message(logger.log(f"THOUGHT: {content}", "blue")))
 
+            self.trajectory.append(
+                {"frame": frame_hash(self.latest_frame), "tool_calls": []}
+            )
             should_continue = False
             for tool_call in tool_calls:
-                name, parameters = tool_call.get("name"), tool_call.get("parameters")
-                should_continue = name != "stop"
-                if not should_continue:
-                    break
-                # Print the tool-call in an easily readable format
-                logger.log(f"ACTION: {name} {str(parameters)}", "red")
-                # Write the tool-call to the message history using the same format used by the model
-                self.messages.append(Message(json.dumps(tool_call)))
-                result = self.call_function(name, parameters)
-
-                self.messages.append(
-                    Message(logger.log(f"OBSERVATION: {result}", "yellow"))
+                name = tool_call.get("name")
+                if name == "stop":
+                    return True
+                should_continue = True
+                # Let the screen settle, unless the speculative pass will do it after the last action
+                self.execute(
+                    tool_call,
+                    settle=not (self.speculation and tool_call is tool_calls[-1]),
                 )
+
+            # Start describing the resulting screen while this step wraps up
+            if should_continue and self.speculation:
+                self.speculation.start(self.messages, name)
+
+            self.keepalive.record_step(time.monotonic() - step_start)
+            self.save_checkpoint()
+
+        return False
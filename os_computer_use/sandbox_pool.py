@@ -0,0 +1,96 @@
+from os_computer_use.keepalive import Keepalive
+
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+
+
+# Keeps booted sandboxes, with their streams started, ready to hand out to tasks
+class SandboxPool:
+
+    def __init__(self, factory, size=2, max_uses=1):
+        self.factory = factory  # Creates a new sandbox
+        self.size = size  # Number of idle sandboxes to keep ready
+        self.max_uses = max_uses  # Tasks a sandbox may run before it is killed
+        self.idle = queue.Queue()
+        self.keepalives = {}  # Keepalives of idle sandboxes, by sandbox id
+        self.booting = 0  # Sandboxes being created
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=size)
+        self.closed = False
+        self.fill()
+
+    # Start booting sandboxes until there are enough idle or booting
+    def fill(self):
+        with self.lock:
+            missing = self.size - self.idle.qsize() - self.booting
+            missing = 0 if self.closed else max(0, missing)
+            self.booting += missing
+        for _ in range(missing):
+            self.executor.submit(self.boot)
+
+    def start_sandbox(self):
+        sandbox = self.factory()
+        sandbox.stream.start()
+        sandbox.pool_uses = 0
+        return sandbox
+
+    def boot(self):
+        try:
+            self.park(self.start_sandbox())
+        except Exception as e:
+            print(f"Error starting pooled sandbox: {e}")
+        finally:
+            with self.lock:
+                self.booting -= 1
+
+    # Keep an idle sandbox alive until it is handed out
+    def park(self, sandbox):
+        if self.closed:
+            self.kill(sandbox)
+            return
+        keepalive = Keepalive(sandbox)
+        keepalive.start()
+        self.keepalives[id(sandbox)] = keepalive
+        self.idle.put(sandbox)
+
+    def kill(self, sandbox):
+        try:
+            sandbox.kill()
+        except Exception as e:
+            print(f"Error stopping pooled sandbox: {e}")
+
+    # Take a ready sandbox, booting one now if none is ready or on its way
+    def acquire(self):
+        while True:
+            with self.lock:
+                boot_now = self.idle.empty() and self.booting == 0
+            if boot_now:
+                sandbox = self.start_sandbox()
+                break
+            try:
+                sandbox = self.idle.get(timeout=1)
+            except queue.Empty:
+                continue
+            self.keepalives.pop(id(sandbox)).stop()
+            break
+        sandbox.pool_uses += 1
+        self.fill()
+        return sandbox
+
+    # Return a sandbox after a task, keeping it for another task if the policy allows
+    def release(self, sandbox, reusable=True):
+        full = self.idle.qsize() >= self.size
+        if not reusable or full or self.closed or sandbox.pool_uses >= self.max_uses:
+            self.kill(sandbox)
+        else:
+            self.park(sandbox)
+        self.fill()
+
+    def close(self):
+        self.closed = True
+        self.executor.shutdown(wait=True)
+        while not self.idle.empty():
+            sandbox = self.idle.get()
+            self.keepalives.pop(id(sandbox)).stop()
+            self.kill(sandbox)
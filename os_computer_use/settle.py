@@ -0,0 +1,75 @@
+from os_computer_use.logging import logger
+
+from PIL import Image
+
+import io
+import time
+
+# How long to wait for the screen after each input action:
+# (consecutive identical frames required, timeout in seconds)
+SETTLE_PROFILES = {
+    "click": (2, 3),
+    "click_mark": (2, 3),
+    "double_click": (2, 3),
+    "right_click": (2, 2),
+    "send_key": (2, 3),
+    "type_text": (2, 2),
+    "run_background_command": (3, 8),
+}
+
+# Interval between frames while waiting (seconds)
+SETTLE_INTERVAL = 0.2
+
+# md5sum of empty input, printed when xwd produces no output
+EMPTY_MD5 = "d41d8cd98f00b204e9800998ecf8427e"
+
+# Size of the downsampled frames compared when xwd is unavailable
+THUMBNAIL_SIZE = (64, 48)
+
+
+# Waits for the screen to stop changing after an action
+class SettleDetector:
+
+    def __init__(self, sandbox, camera=None):
+        self.sandbox = sandbox
+        self.camera = camera or sandbox  # Takes screenshots when xwd is unavailable
+        self.display = getattr(sandbox, "_display", ":0")
+        self.use_xwd = True  # Hash frames inside the sandbox instead of downloading them
+
+    # A value that changes whenever the screen content changes
+    def frame_signature(self):
+        if self.use_xwd:
+            try:
+                result = self.sandbox.commands.run(
+                    f"xwd -display {self.display} -root -silent | md5sum", timeout=5
+                )
+                signature = result.stdout.split()[0] if result.stdout else None
+                if signature and signature != EMPTY_MD5:
+                    return signature
+            except Exception:
+                pass
+            logger.log(
+                "xwd is not available, comparing downsampled screenshots instead", "gray"
+            )
+            self.use_xwd = False
+
+        image = Image.open(io.BytesIO(self.camera.screenshot()))
+        # Drop the low bits so that scaling noise doesn't count as a change
+        thumbnail = image.convert("L").resize(THUMBNAIL_SIZE).point(lambda v: v >> 3)
+        return thumbnail.tobytes()
+
+    # Block until the screen is stable or the action's timeout expires
+    def wait(self, action):
+        if action not in SETTLE_PROFILES:
+            return True
+        frames, timeout = SETTLE_PROFILES[action]
+        deadline = time.monotonic() + timeout
+
+        signature = self.frame_signature()
+        stable_frames = 1
+        while stable_frames < frames and time.monotonic() < deadline:
+            time.sleep(SETTLE_INTERVAL)
+            next_signature = self.frame_signature()
+            stable_frames = stable_frames + 1 if next_signature == signature else 1
+            signature = next_signature
+        return stable_frames >= frames
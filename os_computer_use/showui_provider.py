@@ -15,15 +15,12 @@ class ShowUIProvider:
     def __init__(self):
         self.client = Client(SHOWUI_HUGGINGFACE_SOURCE)
 
-    def extract_norm_point(self, response, image_url):
-        if isinstance(image_url, str):
-            image = Image.open(image_url)
-        else:
-            image = Image.fromarray(np.uint8(image_url))
-        
+    # Scale a normalized point to the size of the image that was sent
+    def extract_norm_point(self, response, image_size):
+        width, height = image_size
         point = ast.literal_eval(response)
         if len(point) == 2:
-            x, y = point[0] * image.width, point[1] * image.height
+            x, y = point[0] * width, point[1] * height
             return x, y
         else:
             return None
@@ -37,8 +34,8 @@ class ShowUIProvider:
             api_name=SHOWUI_HUGGINGFACE_API,
         )
         pred = result[1]
-        img_url = result[0][0]['image']
-        result = self.extract_norm_point(pred, img_url)
+        with Image.open(image_data) as image:
+            result = self.extract_norm_point(pred, image.size)
         return result
 
 if __name__ == "__main__":
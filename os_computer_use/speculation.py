@@ -0,0 +1,68 @@
+from os_computer_use.logging import logger
+
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+
+# Analyzes the next screen in the background while the agent finishes the current step
+class Speculation:
+
+    def __init__(self, camera, settler, analyze):
+        self.camera = camera  # Takes screenshots
+        self.settler = settler  # Detects when the screen stops changing
+        self.analyze = analyze  # Function of (messages, screenshot) returning the analysis
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = None  # (history length, settled frame, analysis)
+        self.closed = False  # Set when the agent closes, so nothing more reaches the sandbox
+
+    # Start analyzing the screen as soon as it settles after the given action
+    def start(self, messages, action):
+        messages = list(messages)
+        frame = Future()
+
+        def speculate():
+            try:
+                self.settler.wait(action)
+                if self.closed:
+                    raise CancelledError()
+                screenshot = self.camera.screenshot()
+            except Exception as e:
+                frame.set_exception(e)
+                raise
+            frame.set_result(screenshot)
+            if self.closed:
+                raise CancelledError()
+            return self.analyze(messages, screenshot)
+
+        self.pending = (len(messages), frame, self.executor.submit(speculate))
+
+    # Block until the speculative frame has been captured
+    def wait_until_settled(self):
+        if self.pending:
+            self.pending[1].exception()
+
+    # Return the analysis if it was made from the same history and screen, otherwise None
+    def take(self, messages, screenshot):
+        if not self.pending:
+            return None
+        history_length, frame, analysis = self.pending
+        self.pending = None
+        try:
+            if history_length == len(messages) and frame.result() == screenshot:
+                logger.log("speculation hit", "gray")
+                return analysis.result()
+        except Exception as e:
+            logger.log(f"speculation failed: {e}", "gray")
+            return None
+        logger.log("speculation discarded", "gray")
+        return None
+
+    # Forget any analysis in progress
+    def cancel(self):
+        self.pending = None
+
+    # Stop the background thread, dropping any analysis that hasn't started.
+    # A model call that is already running finishes on its own, and its result is ignored.
+    def close(self):
+        self.closed = True
+        self.pending = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
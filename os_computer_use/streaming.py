@@ -1,15 +1,37 @@
 from e2b_desktop import Sandbox as SandboxBase
+from os_computer_use.display import DisplayProfile
 import asyncio
 import os
 import signal
 import sys
 
+# Length of each recorded file (seconds)
+SEGMENT_SECONDS = 60
+# Longest time between keyframes while the screen changes (seconds)
+KEYFRAME_INTERVAL = 10
+
 
 class Sandbox(SandboxBase):
 
+    def __init__(self, display_profile=None, **kwargs):
+        # The desktop starts with the resolution and DPI of the profile
+        self.display_profile = display_profile or DisplayProfile()
+        super().__init__(
+            resolution=self.display_profile.resolution,
+            dpi=self.display_profile.dpi,
+            **kwargs,
+        )
+
     def start_stream(self):
-        # Command to start streaming using ffmpeg
-        command = "ffmpeg -f x11grab -s 1024x768 -framerate 30 -i {self._display} -vcodec libx264 -preset ultrafast -tune zerolatency -f mpegts -listen 1 http://localhost:8080"
+        # Command to start streaming using ffmpeg. Repeated frames are dropped,
+        # so the frame rate falls to near zero while the screen is static.
+        width, height = self.display_profile.resolution
+        command = (
+            f"ffmpeg -f x11grab -s {width}x{height} -framerate 30 -i {self._display} "
+            f"-vf mpdecimate -vsync vfr -vcodec libx264 -preset ultrafast -tune zerolatency "
+            f"-force_key_frames 'expr:gte(t,n_forced*{KEYFRAME_INTERVAL})' "
+            f"-f mpegts -listen 1 http://localhost:8080"
+        )
         # Run the command in the background
         process = self.commands.run(
             command,
@@ -25,21 +47,34 @@ class Sandbox(SandboxBase):
         super().kill()
 
 
-# Client to view and save a live display stream from the sandbox
+# Client to view and save a live display stream from the sandbox.
+# The stream is recorded without transcoding, in segments listed in a playlist.
 class DisplayClient:
-    def __init__(self, output_dir="."):
+    def __init__(self, output_dir=".", viewer=True):
         self.process = None
-        # Define output stream and file paths
-        self.output_stream = f"{output_dir}/output.ts"
+        self.viewer = viewer  # Show the stream in an ffplay window while recording
+        # Define output segment, playlist and file paths
+        self.output_segments = f"{output_dir}/output_%03d.ts"
+        self.output_playlist = f"{output_dir}/output.m3u8"
         self.output_file = f"{output_dir}/output.mp4"
 
     async def start(self, stream_url, title="Sandbox", delay=0):
         title = title.replace("'", "\\'")
-        # Start a subprocess to both view and save the stream
+        # Copy the stream into segment files, and to the viewer if there is one
+        command = (
+            f"sleep {delay} && ffmpeg -loglevel quiet -reconnect 1 -i {stream_url} "
+            f"-map 0 -c copy -f segment -segment_time {SEGMENT_SECONDS} "
+            f"-segment_format mpegts -segment_list {self.output_playlist} "
+            f"-segment_list_type m3u8 {self.output_segments}"
+        )
+        if self.viewer:
+            command += (
+                f" -map 0 -c copy -f mpegts - | "
+                f"ffplay -autoexit -i -loglevel quiet -window_title '{title}' -"
+            )
+        # Start a subprocess to record and optionally view the stream
         self.process = await asyncio.create_subprocess_shell(
-            f"sleep {delay} && ffmpeg -reconnect 1 -i {stream_url} -c:v libx264 -preset fast -crf 23 "
-            f"-c:a aac -b:a 128k -f mpegts -loglevel quiet - | tee {self.output_stream} | "
-            f"ffplay -autoexit -i -loglevel quiet -window_title '{title}' -",
+            command,
             preexec_fn=os.setsid,
             stdin=asyncio.subprocess.DEVNULL,
         )
@@ -52,10 +87,11 @@ class DisplayClient:
                 pass
             await self.process.wait()
 
+    # The playlist of segments can be played as it is. This joins the segments
+    # into a single mp4 file for players that need one.
     async def save_stream(self):
-        # Convert the saved stream to an mp4 file
         process = await asyncio.create_subprocess_shell(
-            f"ffmpeg -i {self.output_stream} -c:v copy -c:a copy -loglevel quiet {self.output_file}"
+            f"ffmpeg -i {self.output_playlist} -c copy -loglevel quiet {self.output_file}"
         )
         await process.wait()
 
@@ -0,0 +1,53 @@
+from os_computer_use.grounding import normalize_text
+
+from PIL import Image
+import hashlib
+import io
+import json
+import numpy as np
+import os
+
+# Size of the difference hash of a frame (bits per side)
+HASH_SIZE = 16
+# Number of differing bits up to which two frames show the same screen
+FRAME_TOLERANCE = 8
+
+
+# Perceptual hash of a screenshot that ignores small changes such as a clock ticking
+def frame_hash(screenshot):
+    image = Image.open(io.BytesIO(screenshot)).convert("L")
+    pixels = np.asarray(image.resize((HASH_SIZE + 1, HASH_SIZE)), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return np.packbits(bits).tobytes().hex()
+
+
+def frames_match(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1") <= FRAME_TOLERANCE
+
+
+# Stores the steps of successful runs so that repeated instructions can be replayed
+class TrajectoryStore:
+
+    def __init__(self, directory="./trajectories"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, instruction):
+        key = hashlib.sha256(normalize_text(instruction).encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    # The recorded steps for an instruction, or None if it hasn't succeeded before
+    def load(self, instruction):
+        try:
+            with open(self.path(instruction), "r") as f:
+                return json.load(f)["steps"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    # Record the steps of a successful run, as a list of
+    # {"frame": frame hash, "tool_calls": [{"name", "parameters", "position"}]}
+    def save(self, instruction, steps):
+        path = self.path(instruction)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"instruction": instruction, "steps": steps}, f)
+        os.replace(f"{path}.tmp", path)
@@ -0,0 +1,55 @@
+from urllib.parse import urlsplit
+import httpx
+import importlib.util
+import threading
+
+# Use HTTP/2 when the h2 package is installed
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Connection pool of each client
+POOL_LIMITS = httpx.Limits(
+    max_connections=20, max_keepalive_connections=10, keepalive_expiry=120
+)
+# Model calls can take minutes, but connecting should be quick
+TIMEOUT = httpx.Timeout(600, connect=10)
+
+# One pooled client per host, shared by all providers
+clients = {}
+clients_lock = threading.Lock()
+
+
+# Return the shared HTTP client for the host of a URL
+def get_http_client(url):
+    host = urlsplit(url).netloc
+    with clients_lock:
+        if host not in clients:
+            clients[host] = httpx.Client(
+                http2=HTTP2, limits=POOL_LIMITS, timeout=TIMEOUT
+            )
+        return clients[host]
+
+
+# Open connections to the providers' endpoints in the background,
+# so that the first model call doesn't pay for DNS, TCP and TLS setup
+def preconnect(*providers):
+    # Cascading providers wrap several providers
+    providers = [
+        inner
+        for provider in providers
+        for inner in getattr(provider, "providers", [provider])
+    ]
+    urls = {getattr(provider, "base_url", None) for provider in providers}
+    threads = []
+    for url in filter(None, urls):
+        thread = threading.Thread(target=connect, args=(url,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def connect(url):
+    try:
+        # Any response leaves an open connection in the pool
+        get_http_client(url).head(url, timeout=10)
+    except httpx.HTTPError as e:
+        print(f"Could not connect to {url}: {e}")
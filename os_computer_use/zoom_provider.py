@@ -0,0 +1,59 @@
+from PIL import Image
+
+import atexit
+import os
+import shutil
+import tempfile
+
+# Longest side of the downscaled frame used for the first pass (pixels)
+COARSE_SIZE = 512
+# Size of the tile used for the second pass, relative to the frame
+TILE_FRACTION = 0.25
+# Magnification of the tile in the second pass
+TILE_ZOOM = 2
+
+
+class ZoomProvider:
+    """
+    The zoom provider wraps a grounding provider and locates elements in two passes:
+    once on a downscaled frame, then on an enlarged tile around the first guess.
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.tmp_dir = tempfile.mkdtemp()  # Folder to store the scaled images
+        atexit.register(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+    def save(self, image, name):
+        filepath = os.path.join(self.tmp_dir, name)
+        image.save(filepath)
+        return filepath
+
+    def call(self, prompt, image_data):
+        image = Image.open(image_data)
+        width, height = image.size
+
+        # Find the region of the element on a downscaled frame
+        scale = min(1, COARSE_SIZE / max(width, height))
+        coarse = image.resize((round(width * scale), round(height * scale)), Image.LANCZOS)
+        position = self.provider.call(prompt, self.save(coarse, "coarse.png"))
+        if not position:
+            return None
+        x, y = position[0] / scale, position[1] / scale
+
+        # Look again at an enlarged tile centered on that region
+        tile_width, tile_height = round(width * TILE_FRACTION), round(height * TILE_FRACTION)
+        left = min(max(0, round(x - tile_width / 2)), width - tile_width)
+        top = min(max(0, round(y - tile_height / 2)), height - tile_height)
+        tile = image.crop((left, top, left + tile_width, top + tile_height)).resize(
+            (tile_width * TILE_ZOOM, tile_height * TILE_ZOOM), Image.LANCZOS
+        )
+        position = self.provider.call(prompt, self.save(tile, "tile.png"))
+
+        # Keep the first guess if the element wasn't found on the tile
+        if not position:
+            return round(x), round(y)
+        tile_x, tile_y = position[0] / TILE_ZOOM, position[1] / TILE_ZOOM
+        if not (0 <= tile_x <= tile_width and 0 <= tile_y <= tile_height):
+            return round(x), round(y)
+        return round(left + tile_x), round(top + tile_y)
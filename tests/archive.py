@@ -0,0 +1,58 @@
+from os_computer_use.archive import RunArchive, ArchiveReader, prune_archives
+
+import os
+import tempfile
+
+
+if __name__ == "__main__":
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "run.archive")
+    log = [{"text": "screenshot /tmp/screenshot_1.png", "color": "gray"}]
+
+    # Each distinct frame is stored once, and can be read back by name
+    archive = RunArchive(path)
+    first = archive.add_frame(b"frame one", "/tmp/screenshot_1.png")
+    assert archive.add_frame(b"frame one", "/tmp/screenshot_2.png") == first
+    archive.close(log, [{"frame": "0f", "tool_calls": []}])
+    reader = ArchiveReader(path)
+    assert reader.frame(reader.images["/tmp/screenshot_2.png"]) == b"frame one"
+    assert reader.log == log and reader.trace[0]["frame"] == "0f"
+    reader.close()
+
+    # Reopening a closed archive continues it, keeping the earlier frames and log
+    archive = RunArchive(path)
+    second = archive.add_frame(b"frame two", "/tmp/screenshot_3.png")
+    archive.close([{"text": "second session", "color": "black"}])
+    reader = ArchiveReader(path)
+    assert reader.frame(first) == b"frame one" and reader.frame(second) == b"frame two"
+    assert [entry["text"] for entry in reader.log] == [log[0]["text"], "second session"]
+    reader.close()
+
+    # The frames of an archive that was never closed are recovered from its records,
+    # dropping a record that was cut off
+    crashed = os.path.join(directory, "crashed.archive")
+    archive = RunArchive(crashed)
+    kept = archive.add_frame(b"x" * 100_000, "/tmp/screenshot_1.png")
+    archive.add_frame(b"y" * 1000, "/tmp/screenshot_2.png")
+    archive.file.truncate(archive.file.tell() - 500)
+    archive.file.close()
+    archive = RunArchive(crashed)
+    assert set(archive.frames) == {kept}
+    assert archive.images == {"/tmp/screenshot_1.png": kept}
+    archive.close()
+    reader = ArchiveReader(crashed)
+    assert reader.frame(kept) == b"x" * 100_000
+    reader.close()
+
+    # A file that isn't an archive is moved aside rather than overwritten
+    invalid = os.path.join(directory, "invalid.archive")
+    with open(invalid, "wb") as f:
+        f.write(b"not an archive")
+    RunArchive(invalid).close()
+    with open(f"{invalid}.invalid", "rb") as f:
+        assert f.read() == b"not an archive"
+
+    # Old archives are deleted beyond the retention limits
+    prune_archives(os.path.join(directory, "*.archive"), max_runs=1)
+    assert len([name for name in os.listdir(directory) if name.endswith(".archive")]) == 1
+    print("All archive checks passed.")
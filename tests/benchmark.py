@@ -0,0 +1,169 @@
+from os_computer_use.llm_provider import (
+    OpenAIBaseProvider,
+    AnthropicBaseProvider,
+    MistralBaseProvider,
+)
+from os_computer_use import providers
+import os
+import sys
+
+# Find the shared test modules whether this runs as a script or as a module of tests
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from prompts import tools, toolcall_messages, messages
+from stub_server import StubServer
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import httpx
+import json
+import math
+import time
+
+# Workloads: name -> (messages, tools)
+WORKLOADS = {
+    "vision": (messages, None),
+    "tool call": (toolcall_messages, tools),
+}
+
+
+# Create a subclass of a provider class that calls the stub server
+def stub_provider(base, url, model="stub-model"):
+    if issubclass(base, AnthropicBaseProvider):
+        base_url = url
+    else:
+        base_url = f"{url}/v1"
+    cls = type(base.__name__, (base,), {"base_url": base_url, "api_key": "stub"})
+    return cls(model)
+
+
+# Nearest-rank percentile
+def percentile(values, p):
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+# Make a number of calls at a concurrency level, and return their latencies,
+# the number of failures and the total time
+def run_load(call, requests, concurrency):
+    errors = set()
+
+    def timed():
+        start = time.perf_counter()
+        try:
+            call()
+        except Exception as e:
+            errors.add(str(e))
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: timed(), range(requests)))
+    elapsed = time.perf_counter() - start
+    for error in errors:
+        print(f"Error: {error}")
+    latencies = [result for result in results if result is not None]
+    return latencies, len(results) - len(latencies), elapsed
+
+
+# The cost of the same request sent with a bare HTTP client,
+# used to separate the providers' overhead from the server and network
+def baseline_call(client, url, provider, workload):
+    history, functions = WORKLOADS[workload]
+    body = json.dumps(
+        {
+            "model": provider.model,
+            "messages": [provider.transform_message(m) for m in history],
+            "tools": provider.create_function_schema(functions) if functions else None,
+        }
+    )
+    headers = {"Content-Type": "application/json"}
+    return lambda: client.post(
+        f"{url}/v1/chat/completions", content=body, headers=headers
+    ).raise_for_status()
+
+
+def provider_call(provider, workload):
+    history, functions = WORKLOADS[workload]
+    # Providers may modify the messages, so each call gets its own copy
+    return lambda: provider.call([dict(m) for m in history], functions)
+
+
+def format_row(name, workload, concurrency, latencies, failures, elapsed, baseline):
+    if not latencies:
+        return f"{name:<30} {workload:<10} {concurrency:>4}  all {failures} calls failed"
+    ms = [1000 * latency for latency in latencies]
+    p50, p95, p99 = (percentile(ms, p) for p in (50, 95, 99))
+    overhead = f"{p50 - baseline:8.1f}" if baseline is not None else f"{'-':>8}"
+    return (
+        f"{name:<30} {workload:<10} {concurrency:>4} {p50:8.1f} {p95:8.1f} {p99:8.1f} "
+        f"{overhead} {len(latencies) / elapsed:8.1f}"
+        + (f"  ({failures} failed)" if failures else "")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the latency and throughput of the model providers"
+    )
+    parser.add_argument("--requests", type=int, default=50, help="Calls per run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument(
+        "--delay", type=float, default=0.0, help="Inference time of the stub server"
+    )
+    parser.add_argument(
+        "--provider",
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("CLASS", "MODEL"),
+        help="Also benchmark a real provider, e.g. --provider GroqProvider llama-3.3",
+    )
+    args = parser.parse_args()
+
+    server = StubServer(delay=args.delay).start()
+    reference = stub_provider(OpenAIBaseProvider, server.url)
+    targets = [
+        (f"{base.__name__} (stub)", stub_provider(base, server.url))
+        for base in (OpenAIBaseProvider, AnthropicBaseProvider, MistralBaseProvider)
+    ]
+    targets += [
+        (f"{name} ({model})", getattr(providers, name)(model))
+        for name, model in args.provider
+    ]
+
+    print(
+        f"{'provider':<30} {'workload':<10} {'conc':>4} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'overhead':>8} {'calls/s':>8}"
+    )
+    with httpx.Client(limits=httpx.Limits(max_connections=None)) as client:
+        for workload in WORKLOADS:
+            for concurrency in args.concurrency:
+                baseline = run_load(
+                    baseline_call(client, server.url, reference, workload),
+                    args.requests,
+                    concurrency,
+                )
+                print(format_row("httpx (stub)", workload, concurrency, *baseline, None))
+                baseline_p50 = 1000 * percentile(baseline[0], 50)
+                for name, provider in targets:
+                    result = run_load(
+                        provider_call(provider, workload), args.requests, concurrency
+                    )
+                    # Overhead is only meaningful against the same server
+                    stub = name.endswith("(stub)")
+                    print(
+                        format_row(
+                            name,
+                            workload,
+                            concurrency,
+                            *result,
+                            baseline_p50 if stub else None,
+                        )
+                    )
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
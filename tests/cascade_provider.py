@@ -0,0 +1,93 @@
+from os_computer_use.cascade_provider import CascadeProvider
+
+import json
+
+
+# This is a fake provider that returns a fixed response and counts its calls
+class FakeProvider:
+    def __init__(self, model, response):
+        self.model = model
+        self.response = response
+        self.calls = 0
+
+    def call(self, messages, functions=None):
+        self.calls += 1
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+tools = {"click": {"description": "Click", "params": {"query": "Item"}}}
+click = {"type": "function", "name": "click", "parameters": {"query": "OK"}}
+objective = {"role": "user", "content": "OBJECTIVE: click OK"}
+
+
+def cascade(fast_response):
+    strong = FakeProvider("strong", ("strong", [click]))
+    return CascadeProvider(FakeProvider("fast", fast_response), strong)
+
+
+# Call the provider and keep the response, as the agent does with the responses it uses
+def call(provider, messages, functions=None):
+    response = provider.call(messages, functions)
+    provider.keep(response)
+    return response
+
+
+if __name__ == "__main__":
+    # A good response from the fast model is used as it is
+    provider = cascade(("fast", [click]))
+    assert call(provider, [objective], tools) == ("fast", [click])
+    assert provider.strong.calls == 0
+
+    # Responses without actions are escalated
+    provider = cascade(("", []))
+    assert call(provider, [objective], tools)[0] == "strong"
+    assert provider.escalations == {"no tool calls": 1}
+    provider = cascade("")
+    assert call(provider, [objective]) == ("strong", [click])
+    assert provider.escalations == {"empty response": 1}
+
+    # Repeating the previous actions is escalated
+    provider = cascade(("fast", [click]))
+    executed = {"role": "assistant", "content": json.dumps(click)}
+    done = {"role": "assistant", "content": "OBSERVATION: Clicked OK"}
+    call(provider, [objective, executed, done], tools)
+    assert provider.escalations == {"repeated actions": 1}
+    thought = {"role": "assistant", "content": "THOUGHT: The dialog is still open"}
+    call(provider, [objective, executed, done, thought], tools)
+    assert provider.escalations == {"repeated actions": 2}
+
+    # Responses that are discarded, such as speculative ones, are not counted
+    provider = cascade(("", []))
+    provider.call([objective], tools)
+    assert provider.calls == 0 and provider.escalations == {}
+    assert provider.report() == ""
+    call(provider, [objective], tools)
+    assert provider.calls == 1 and provider.escalations == {"no tool calls": 1}
+
+    # Errors from the fast model are escalated
+    provider = cascade(RuntimeError("rate limited"))
+    assert call(provider, [objective], tools)[0] == "strong"
+    assert provider.escalations == {"error": 1}
+
+    # An unchanged screen skips the fast model once
+    provider = cascade(("fast", [click]))
+    provider.escalate_next = True
+    call(provider, [objective], tools)
+    assert provider.fast.calls == 0 and provider.escalations == {"unchanged screen": 1}
+    call(provider, [objective], tools)
+    assert provider.fast.calls == 1
+
+    # So does an error observation after the last action
+    provider = cascade(("fast", [click]))
+    observation = {
+        "role": "assistant",
+        "content": "OBSERVATION: There is no element numbered 3 on the screen.",
+    }
+    call(provider, [objective, observation], tools)
+    assert provider.fast.calls == 0 and provider.escalations == {"error observation": 1}
+    assert provider.report() == (
+        "fast > strong: 1/1 calls escalated (100%) - error observation: 1"
+    )
+    print("All cascade provider checks passed.")
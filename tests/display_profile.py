@@ -0,0 +1,19 @@
+from os_computer_use.display import DisplayProfile
+
+
+if __name__ == "__main__":
+    profile = DisplayProfile(800, 600, dpi_scale=1.25, color_depth=16)
+    assert profile.resolution == (800, 600) and profile.dpi == 120
+
+    # Positions on a screenshot at the screen's size are unchanged
+    assert profile.to_screen((400, 300), (800, 600)) == (400, 300)
+
+    # Positions on a scaled image are mapped back to screen pixels
+    assert profile.to_screen((512, 384), (1024, 768)) == (400, 300)
+    assert profile.to_screen((100.6, 50.2), (400, 300)) == (201, 100)
+
+    # Positions outside the image are kept on the screen
+    assert profile.to_screen((-20, 5000), (800, 600)) == (0, 599)
+
+    assert DisplayProfile.parse_resolution("1280X800") == (1280, 800)
+    print("All display profile checks passed.")
@@ -6,44 +6,12 @@ from os_computer_use.providers import (
     MistralProvider,
 )
 from os_computer_use.llm_provider import Message
+import os
+import sys
 
-# Define tools available for use
-tools = {
-    "click_item": {
-        "description": "Click on an item on the screen",
-        "params": {"description": "Description of the item to click on"},
-    }
-}
-
-
-
-# Function to simulate taking a screenshot
-def screenshot():
-    with open("./tests/test_screenshot.png", "rb") as f:
-        return f.read()
-
-
-# Prompt to test tool calls with vision
-toolcall_messages = [
-    Message(
-        [
-            "You can use tools to operate the computer. Take the next step to Google.com",
-            screenshot(),
-        ],
-        role="user",
-    )
-]
-
-# Prompt to test vision
-messages = [
-    Message(
-        [
-            "Describe what you see in the image below.",
-            screenshot(),
-        ],
-        role="user",
-    )
-]
+# Find the shared test modules whether this runs as a script or as a module of tests
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from prompts import tools, toolcall_messages, messages
 
 # Anthropic
 opus = AnthropicProvider("claude-3-opus")
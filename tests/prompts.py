@@ -0,0 +1,38 @@
+from os_computer_use.llm_provider import Message
+
+# Define tools available for use
+tools = {
+    "click_item": {
+        "description": "Click on an item on the screen",
+        "params": {"description": "Description of the item to click on"},
+    }
+}
+
+
+# Function to simulate taking a screenshot
+def screenshot():
+    with open("./tests/test_screenshot.png", "rb") as f:
+        return f.read()
+
+
+# Prompt to test tool calls with vision
+toolcall_messages = [
+    Message(
+        [
+            "You can use tools to operate the computer. Take the next step to Google.com",
+            screenshot(),
+        ],
+        role="user",
+    )
+]
+
+# Prompt to test vision
+messages = [
+    Message(
+        [
+            "Describe what you see in the image below.",
+            screenshot(),
+        ],
+        role="user",
+    )
+]
@@ -0,0 +1,87 @@
+from os_computer_use.capture import RegionCapture
+
+from PIL import Image, ImageDraw
+import io
+import json
+import os
+import stat
+import subprocess
+import tempfile
+
+
+# This is a fake sandbox that runs commands locally, with a scrot that copies a file
+class FakeSandbox:
+    def __init__(self, screen_path):
+        self.commands = self
+        self.captures = []  # Output of each capture command
+        self.screen_path = screen_path
+        self.fail = False
+
+    def run(self, command, timeout=None):
+        if self.fail:
+            raise RuntimeError("python3 is not installed")
+        process = subprocess.run(
+            command, shell=True, capture_output=True, text=True, check=True
+        )
+        self.captures.append(json.loads(process.stdout))
+        return process
+
+    def screenshot(self):
+        with open(self.screen_path, "rb") as f:
+            return f.read()
+
+
+def pixels(png):
+    return list(Image.open(io.BytesIO(png)).convert("RGB").getdata())
+
+
+if __name__ == "__main__":
+    directory = tempfile.mkdtemp()
+    scrot = os.path.join(directory, "scrot")
+    with open(scrot, "w") as f:
+        f.write('#!/bin/sh\ncp "$FAKE_SCREEN" "$3"\n')
+    os.chmod(scrot, os.stat(scrot).st_mode | stat.S_IEXEC)
+    os.environ["PATH"] = f"{directory}:{os.environ['PATH']}"
+    screen_path = os.path.join(directory, "screen.png")
+    os.environ["FAKE_SCREEN"] = screen_path
+    # Keep the capture state in the test folder rather than the host's /tmp
+    state_dir = tempfile.mkdtemp()
+
+    screen = Image.open("./tests/test_screenshot.png").convert("RGB")
+    screen.save(screen_path)
+    sandbox = FakeSandbox(screen_path)
+    camera = RegionCapture(sandbox, state_dir=state_dir)
+
+    # The first capture sends the whole frame
+    first = camera.screenshot()
+    assert sandbox.captures[-1]["box"] == [0, 0, *screen.size]
+    assert pixels(first) == list(screen.getdata())
+
+    # An unchanged screen sends nothing
+    assert camera.screenshot() == first
+    assert sandbox.captures[-1]["box"] is None
+
+    # A change sends only its region, which is pasted onto the previous frame
+    ImageDraw.Draw(screen).rectangle([100, 100, 149, 139], fill="blue")
+    screen.save(screen_path)
+    changed = camera.screenshot()
+    assert sandbox.captures[-1]["box"] == [100, 100, 150, 140]
+    assert pixels(changed) == list(screen.getdata())
+
+    # A client that doesn't hold the sandbox's previous frame gets the whole frame
+    other = RegionCapture(sandbox, state_dir=state_dir)
+    assert pixels(other.screenshot()) == list(screen.getdata())
+    assert sandbox.captures[-1]["box"] == [0, 0, *screen.size]
+    # ...and the first client, now out of sequence, does too
+    camera.screenshot()
+    assert sandbox.captures[-1]["box"] == [0, 0, *screen.size]
+
+    # Lower color depths keep only the high bits of each channel
+    reduced = RegionCapture(sandbox, color_depth=16, state_dir=state_dir).screenshot()
+    assert all(value & 0b111 == 0 for pixel in pixels(reduced) for value in pixel)
+
+    # Full screenshots are used when the capture script fails
+    sandbox.fail = True
+    broken = RegionCapture(sandbox, state_dir=state_dir)
+    assert broken.screenshot() == sandbox.screenshot() and not broken.available
+    print("All region capture checks passed.")
@@ -0,0 +1,64 @@
+from os_computer_use.sandbox_pool import SandboxPool
+
+import itertools
+import time
+
+
+# This is a fake sandbox that boots slowly and records how it is used
+class FakeSandbox:
+    ids = itertools.count(1)
+
+    class Stream:
+        def __init__(self):
+            self.started = False
+
+        def start(self):
+            self.started = True
+
+        def get_url(self):
+            return "http://localhost:6080/vnc.html"
+
+    def __init__(self):
+        time.sleep(0.2)
+        self.sandbox_id = next(self.ids)
+        self.stream = self.Stream()
+        self.timeout = None
+        self.killed = False
+
+    def set_timeout(self, timeout):
+        self.timeout = timeout
+
+    def kill(self):
+        self.killed = True
+
+
+if __name__ == "__main__":
+    pool = SandboxPool(FakeSandbox, size=2)
+
+    # Sandboxes are handed out booted, with the stream started and kept alive
+    first = pool.acquire()
+    assert first.stream.started and first.timeout
+    time.sleep(0.5)
+    start = time.monotonic()
+    second = pool.acquire()
+    assert time.monotonic() - start < 0.1, "The pool should have a sandbox ready"
+
+    # Used sandboxes are killed by default
+    pool.release(first)
+    assert first.killed
+
+    # Sandboxes can be reused up to max_uses while the pool needs them
+    reuse_pool = SandboxPool(FakeSandbox, size=1, max_uses=2)
+    time.sleep(0.5)
+    sandbox = reuse_pool.acquire()
+    reuse_pool.release(sandbox)
+    assert not sandbox.killed and sandbox.timeout
+    assert reuse_pool.acquire() is sandbox
+    reuse_pool.release(sandbox)
+    assert sandbox.killed
+    reuse_pool.close()
+
+    pool.release(second)
+    pool.close()
+    assert pool.idle.empty()
+    print("All sandbox pool checks passed.")
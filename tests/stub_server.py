@@ -0,0 +1,127 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import threading
+import time
+
+
+# Reply to a request with the first tool if tools were passed, or with text otherwise
+def openai_response(request):
+    message = {"role": "assistant", "content": "A desktop with a web browser."}
+    if request.get("tools"):
+        function = request["tools"][0]["function"]
+        arguments = {name: "Google" for name in function["parameters"]["properties"]}
+        message = {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": "call_0",
+                    "type": "function",
+                    "function": {
+                        "name": function["name"],
+                        "arguments": json.dumps(arguments),
+                    },
+                }
+            ],
+        }
+    return {
+        "id": "chatcmpl-0",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model"),
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if request.get("tools") else "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+def anthropic_response(request):
+    content = [{"type": "text", "text": "A desktop with a web browser."}]
+    if request.get("tools"):
+        tool = request["tools"][0]
+        arguments = {name: "Google" for name in tool["input_schema"]["properties"]}
+        content.append(
+            {"type": "tool_use", "id": "toolu_0", "name": tool["name"], "input": arguments}
+        )
+    return {
+        "id": "msg_0",
+        "type": "message",
+        "role": "assistant",
+        "model": request.get("model"),
+        "content": content,
+        "stop_reason": "tool_use" if request.get("tools") else "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 1, "output_tokens": 1},
+    }
+
+
+ROUTES = {
+    "/v1/chat/completions": openai_response,
+    "/v1/messages": anthropic_response,
+}
+
+
+# Serves OpenAI and Anthropic compatible endpoints with canned responses,
+# waiting a fixed delay to stand in for the model's inference time
+class StubServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, port=0, delay=0.0):
+        self.delay = delay
+        super().__init__(("127.0.0.1", port), StubHandler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"  # Keep connections alive like real endpoints
+    disable_nagle_algorithm = True  # Don't delay small responses
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        route = ROUTES.get(self.path)
+        if not route:
+            return self.send_error(404)
+        time.sleep(self.server.delay)
+        body = json.dumps(route(request)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the stub model server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds per call")
+    args = parser.parse_args()
+    server = StubServer(args.port, args.delay)
+    print(f"Stub server listening at {server.url}")
+    server.serve_forever()